@@ -31,7 +31,7 @@ def kmeans(input, n_cluster=3, max_iter=500, algorithm='lloyd', **kwargs):
     import numpy as np
     import rasterio
     from sklearn.cluster import KMeans
-    from .common import array2raster, reshape_raster
+    from .common import array2raster
 
     # Identify datatype and define input data
     # Raster image
@@ -51,10 +51,8 @@ def kmeans(input, n_cluster=3, max_iter=500, algorithm='lloyd', **kwargs):
     else: 
         raise ValueError('Input is not supported')
     
-    # Reshape from raster to image format, and from 3D to 2D
-    arr_reshape_img = reshape_raster(arr, mode='image')
-    print(arr_reshape_img.shape)
-    img_reshaped = arr_reshape_img.reshape((-1, nbands))
+    # Flatten from raster format to 2D (pixels, bands), a transposed view without copying the image
+    img_reshaped = np.ascontiguousarray(arr).reshape((nbands, -1)).T
 
     # Define KMeans model and fit the KMeans model
     kmean_model = KMeans(n_clusters= n_cluster, max_iter= max_iter, algorithm= algorithm, **kwargs)
@@ -217,7 +215,7 @@ class RandomForest:
 
         """
         import rasterio
-        from .common import reshape_raster, array2raster
+        from .common import array2raster
 
         # Define the model to use
         if model is not None:
@@ -235,9 +233,8 @@ class RandomForest:
             src_width = src.width            
             src_rast = src.read()
             
-            # Reshape and flatten data
-            src_img = reshape_raster(src_rast, mode='image')
-            ds = src_img.reshape((-1, nbands))
+            # Flatten data to (pixels, bands), a transposed view without copying the image
+            ds = src_rast.reshape((nbands, -1)).T
             
             # Predict labels using the define model
             pred_labels = RF_model.predict(ds)
@@ -390,7 +387,7 @@ class SVM:
 
         """
         import rasterio
-        from .common import reshape_raster, array2raster
+        from .common import array2raster
 
         # Define the model to use
         if model is not None:
@@ -408,9 +405,8 @@ class SVM:
             src_width = src.width            
             src_rast = src.read()
             
-            # Reshape and flatten data
-            src_img = reshape_raster(src_rast, mode='image')
-            ds = src_img.reshape((-1, nbands))
+            # Flatten data to (pixels, bands), a transposed view without copying the image
+            ds = src_rast.reshape((nbands, -1)).T
             
             # Predict labels using the define model
             pred_labels = SVM_model.predict(ds)
@@ -560,7 +556,7 @@ class KNN:
 
         """
         import rasterio
-        from geonate.common import reshape_raster, array2raster
+        from geonate.common import array2raster
 
         # Define the model to use
         if model is not None:
@@ -578,9 +574,8 @@ class KNN:
             src_width = src.width            
             src_rast = src.read()
             
-            # Reshape and flatten data
-            src_img = reshape_raster(src_rast, mode='image')
-            ds = src_img.reshape((-1, nbands))
+            # Flatten data to (pixels, bands), a transposed view without copying the image
+            ds = src_rast.reshape((nbands, -1)).T
             
             # Predict labels using the define model
             pred_labels = KNN_model.predict(ds)
@@ -714,7 +709,7 @@ class Gaussian_Naive_Bayes:
             
         """
         import rasterio
-        from geonate.common import reshape_raster, array2raster
+        from geonate.common import array2raster
 
         # Define the random forest model to use
         if model is not None:
@@ -732,9 +727,8 @@ class Gaussian_Naive_Bayes:
             src_width = src.width            
             src_rast = src.read()
             
-            # Reshape and flatten data
-            src_img = reshape_raster(src_rast, mode='image')
-            ds = src_img.reshape((-1, nbands))
+            # Flatten data to (pixels, bands), a transposed view without copying the image
+            ds = src_rast.reshape((nbands, -1)).T
             
             # Predict labels using the defined model
             pred_labels = GNB_model.predict(ds)
@@ -889,7 +883,7 @@ class XGBoost:
             
         """
         import rasterio
-        from geonate.common import reshape_raster, array2raster
+        from geonate.common import array2raster
 
         # Define the random forest model to use
         if model is not None:
@@ -907,9 +901,8 @@ class XGBoost:
             src_width = src.width            
             src_rast = src.read()
             
-            # Reshape and flatten data
-            src_img = reshape_raster(src_rast, mode='image')
-            ds = src_img.reshape((-1, nbands))
+            # Flatten data to (pixels, bands), a transposed view without copying the image
+            ds = src_rast.reshape((nbands, -1)).T
             
             # Predict labels using the defined model
             pred_labels = XGB_model.predict(ds)
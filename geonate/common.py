@@ -3,19 +3,108 @@ The common module contains common functions and classes used by the other module
 
 """
 # import common packages 
-
+import os
+import re
+import math
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import chain
 from typing import AnyStr, Dict, Optional
 
+import numpy as np
+import rasterio
+
+# Length of one degree of longitude at the Equator in meters
+_EQUATOR_M_PER_DEG = 111320.0
+
+
+def _meters_per_degree(latitude):
+    """Length in meters of one degree of longitude at each latitude of an array, computed in a single float buffer
+
+    Args:
+        latitude (array-like): Latitudes in degrees
+
+    Returns:
+        np.ndarray: Meters per degree at each latitude
+
+    """
+    length = np.radians(latitude)
+    np.cos(length, out=length)
+    length *= _EQUATOR_M_PER_DEG
+    return length
+
+
+def _result_buffer(input, length):
+    """Return length as output buffer of an operation with input when the result has its shape and data type, otherwise None
+
+    Args:
+        input (numeric | array): The other operand
+        length (np.ndarray): Array from _meters_per_degree
+
+    Returns:
+        np.ndarray | None: The buffer to pass as out
+
+    """
+    same_shape = (np.ndim(input) == 0) or (np.shape(input) == length.shape)
+    return length if same_shape and (np.result_type(input, length) == length.dtype) else None
+
 ##############################################################################################
 #                                                                                                                                                                                                          #
 #                       Main functions                                                                                                                                                         #
 #                                                                                                                                                                                                           #
 ##############################################################################################
 
+# =========================================================================================== #
+#               Read bounds and crs of a raster file (cached)
+# =========================================================================================== #
+@lru_cache(maxsize=4096)
+def _raster_bounds(path, mtime, size):
+    """Read bounds and crs from the header of a raster file. Results are cached by path, modification time and file size, so a file that is replaced is read again.
+
+    Args:
+        path (AnyStr): The file path of the raster
+        mtime (int): Modification time of the file in nanoseconds
+        size (int): File size in bytes
+
+    Returns:
+        tuple: A tuple containing bounds (BoundingBox) and crs (CRS) of the raster
+
+    """
+
+    with rasterio.Env(GDAL_DISABLE_READDIR_ON_OPEN='EMPTY_DIR'):
+        with rasterio.open(path) as src:
+            return src.bounds, src.crs
+
+
+def raster_bounds(path):
+    """Read bounds and crs of a raster file, local files are served from cache when unchanged
+
+    Args:
+        path (AnyStr): The file path of the raster
+
+    Returns:
+        tuple: A tuple containing bounds (BoundingBox) and crs (CRS) of the raster
+
+    """
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        # Remote or virtual paths (e.g., /vsis3/) cannot be stat-ed, read them without cache
+        return _raster_bounds.__wrapped__(path, None, None)
+
+    return _raster_bounds(path, stat.st_mtime_ns, stat.st_size)
+
+
+# Clear cached raster bounds, e.g., raster_bounds.cache_clear()
+raster_bounds.cache_clear = _raster_bounds.cache_clear
+
+
 # =========================================================================================== #
 #               Create an empty dataframe                                                                                                                                           #
 # =========================================================================================== #
-def empty_dataframe(nrows, ncols, value='NA', name=None):
+def empty_dataframe(nrows, ncols, value='NA', name=None, dtype=None):
     """Create an empty dataframe
 
     Args:
@@ -23,13 +112,13 @@ def empty_dataframe(nrows, ncols, value='NA', name=None):
         ncols (numeric): Number of columns
         value (str | numeric, optional): Input value in all cells. Defaults to 'NA'.
         name (list, optional): Names of columns, if not given, it will return default as number of column. Defaults to None.
+        dtype (data-type, optional): Data type of all columns, e.g., np.float32 to halve memory. Defaults to None, int64 for integer values and float64 otherwise.
 
     Returns:
         Dataframe (pandas datafram): An empty filled with NA or user-defined number (e.g., 0)
 
     """
     import pandas as pd
-    import numpy as np
     
     # Check validity of column name
     if name is None:
@@ -39,20 +128,14 @@ def empty_dataframe(nrows, ncols, value='NA', name=None):
     else:
         raise ValueError("Length of column names vector must match numbers of columns")
 
-    # check input value
-    try: 
-        if isinstance(value, int):
-            val = value
-        elif isinstance(value, float):
-            val = value
-        else:
-            val = np.nan
-    except ValueError:
-        val = np.nan
+    # check input value, numpy scalars count as numbers too
+    val = value if isinstance(value, (int, float, np.number)) else np.nan
     
-    # Create data and parse it into dataframe 
-    data = [[val] * ncols for _ in range(nrows)]
-    dataframe = pd.DataFrame(data, columns= column_names)
+    # Create data and parse it into dataframe
+    if dtype is None:
+        dtype = np.int64 if isinstance(val, (int, np.integer)) else np.float64
+    data = np.full((nrows, ncols), val, dtype=dtype)
+    dataframe = pd.DataFrame(data, columns= column_names, copy=False)
     
     return dataframe
 
@@ -60,53 +143,94 @@ def empty_dataframe(nrows, ncols, value='NA', name=None):
 # =========================================================================================== #
 #               Find all files in folder with specific pattern                                                                                                                  #
 # =========================================================================================== #
-def listFiles(path: AnyStr, pattern: AnyStr, search_type: AnyStr = 'pattern', full_name: bool=True):
-    """List all files with specific pattern within a folder path
+# Search type names accepted by listFiles
+_SEARCH_TYPES = {'extension': 'extension', 'e': 'extension', 'pattern': 'pattern', 'p': 'pattern'}
+
+def iterFiles(path: AnyStr, pattern: AnyStr, search_type: AnyStr = 'pattern', full_name: bool=True):
+    """Iterate over all files with specific pattern within a folder path, folders are scanned lazily as the iterator is consumed
 
     Args:
-        path (AnyStr): Folder path where files stored
-        pattern (AnyStr): Search pattern of files (e.g., '*.tif')
+        path (AnyStr | os.PathLike): Folder path where files stored
+        pattern (AnyStr): Search pattern of files (e.g., '*.tif'), or file extension for extension search (e.g., 'tif' or '.tif')
         search_type (AnyStr, optional): Search type whether by "extension" or name "pattern". Defaults to 'pattern'.
         full_name (bool, optional): Whether returning full name with path detail or only file name. Defaults to True.
 
     Returns:
-        A string list (list): A list of file paths
+        iterator: File paths or names, in the same order as listFiles
 
     """
-    import os
-    import fnmatch
 
-    # Create empty list to store list of files
-    files_list = []
-
-    # Check search type
-    if (search_type.upper() == 'EXTENSION') or (search_type.upper() == 'E'):
+    # Walk the folder tree with scandir, file type comes from the directory entry without extra stat calls.
+    # Each folder yields one batch of hits which are flattened by chain in C, folders are visited top-down as in os.walk.
+    # Folders that cannot be listed (missing, no permission) are skipped as os.walk does
+    def scan(folder, match):
+        def batches():
+            pending = [folder]
+            while pending:
+                try:
+                    with os.scandir(pending.pop()) as it:
+                        entries = list(it)
+                except OSError:
+                    continue
+                subfolders = [entry.path for entry in entries if entry.is_dir() and not entry.is_symlink()]
+                pending.extend(reversed(subfolders))
+                files = [entry for entry in entries if not entry.is_dir() and match(entry.name)]
+                # Path or name is chosen once per folder rather than once per file
+                yield [entry.path for entry in files] if full_name is True else [entry.name for entry in files]
+
+        return chain.from_iterable(batches())
+
+    # Check search type, resolved once from the table of accepted names
+    kind = _SEARCH_TYPES.get(search_type.lower())
+    if kind == 'extension':
         if '*' in pattern:
             raise ValueError("Do not use '*' in the pattern of extension search")
         else:
-            for root, dirs, files in os.walk(path):
-                for file in files:
-                    if file.lower().endswith(pattern):
-                        if full_name is True:
-                            files_list.append(os.path.join(root, file))
-                        else:
-                            files_list.append(file)    
-    
-    elif (search_type.upper() == 'PATTERN') or (search_type.upper() == 'P'):
+            # Normalise the extension once to lower case with a leading dot, e.g. 'TIF' -> '.tif'
+            pat = pattern.lower()
+            pat = pat if pat.startswith('.') else '.' + pat
+
+            # Only the suffix after the last dot is lowered, not the whole file name
+            if pat.count('.') == 1:
+                def match(name):
+                    _, dot, ext = name.rpartition('.')
+                    return bool(dot) and '.' + ext.lower() == pat
+            # Multi-part extensions such as '.tar.gz' still need a suffix comparison
+            else:
+                def match(name):
+                    return name.lower().endswith(pat)
+
+            files = scan(path, match)
+
+    elif kind == 'pattern':
         if '*' not in pattern:
             raise ValueError("Pattern search requires '*' in pattern")
         else:
-            for root, dirs, files in os.walk(path):
-                for file in fnmatch.filter(files, pattern):
-                    if full_name is True:
-                        files_list.append(os.path.join(root, file))
-                    else:
-                        files_list.append(file)
-    
+            # Compile the pattern once instead of once per folder
+            matcher = re.compile(fnmatch.translate(os.path.normcase(pattern))).match
+            files = scan(path, lambda name: matcher(os.path.normcase(name)))
+
     else:
         raise ValueError('Search pattern must be one of these types (pattern, p, extension, e)')
 
-    return files_list
+    return files
+
+
+def listFiles(path: AnyStr, pattern: AnyStr, search_type: AnyStr = 'pattern', full_name: bool=True):
+    """List all files with specific pattern within a folder path
+
+    Args:
+        path (AnyStr | os.PathLike): Folder path where files stored
+        pattern (AnyStr): Search pattern of files (e.g., '*.tif'), or file extension for extension search (e.g., 'tif' or '.tif')
+        search_type (AnyStr, optional): Search type whether by "extension" or name "pattern". Defaults to 'pattern'.
+        full_name (bool, optional): Whether returning full name with path detail or only file name. Defaults to True.
+
+    Returns:
+        A string list (list): A list of file paths
+
+    """
+
+    return list(iterFiles(path, pattern, search_type, full_name))
 
 
 # =========================================================================================== #
@@ -117,7 +241,7 @@ def check_extension_consistency(input):
     Checks if all elements in the input list have the same file extension.
 
     Args:
-        input (list): A list of file paths as strings.
+        input (list): A list of file paths as strings or os.PathLike objects.
 
     Returns:
         tuple: A tuple containing:
@@ -125,20 +249,19 @@ def check_extension_consistency(input):
             - str or None: The file extension if all elements have the same extension, otherwise None.
 
     """
-    import numpy
 
     # Check whether a list or not
     if not isinstance(input, list):
         raise ValueError("Input must be a list of file paths")
     
     else:
-        # Check whether all are string
-        if not all(isinstance(x, str) for x in input):
+        # Check whether all are string or path objects
+        if not all(isinstance(x, (str, os.PathLike)) for x in input):
             raise ValueError('Input must contain only string of file paths')
         else:
-            # 
-            extensions = [e.split(".")[-1] for e in input]
-            no_extension = len(numpy.unique(extensions))
+            # Path objects are converted once here, the paths themselves are passed on unchanged
+            extensions = [os.fspath(e).split(".")[-1] for e in input]
+            no_extension = len(np.unique(extensions))
             if no_extension == 1:
                 consistency = True
                 extension = str(extensions[0])
@@ -196,7 +319,6 @@ def check_crs_consistency(input):
             - str or None: The CRS of the elements if all elements have the same CRS, otherwise None.
     
     """
-    import numpy
     from .geonate import rast, vect
     
     if not isinstance(input, list):
@@ -207,7 +329,7 @@ def check_crs_consistency(input):
         
         if str(inputType) == "<class 'str'>":
             file_extensions  = [x.split(".")[-1] for x in input]
-            file_extension = numpy.unique(file_extensions)
+            file_extension = np.unique(file_extensions)
             extension_len = len(file_extension)
 
             if extension_len > 1:
@@ -218,8 +340,8 @@ def check_crs_consistency(input):
                     files = [rast(file) for file in input]
                     crs_list = [x.crs.to_string() for x in files]
 
-                    if len(numpy.unique(crs_list)) == 1:
-                        crs = numpy.unique(crs_list)
+                    if len(np.unique(crs_list)) == 1:
+                        crs = np.unique(crs_list)
                         consistency = True
                         print(f"Input is Raster with consistent crs of {crs}")
                         return consistency, crs[0]
@@ -232,8 +354,8 @@ def check_crs_consistency(input):
                 elif str(file_extension[0]) == 'shp':
                     files = [vect(file) for file in input]
                     crs_list = [file.crs.to_string() for file in files]
-                    if len(numpy.unique(crs_list)) == 1:
-                        crs = numpy.unique(crs_list)
+                    if len(np.unique(crs_list)) == 1:
+                        crs = np.unique(crs_list)
                         consistency = True
                         print(f"Input is Shapefile with consistent crs of {crs}")
                         return consistency, crs[0]
@@ -248,7 +370,7 @@ def check_crs_consistency(input):
 
         elif str(inputType) == "<class 'rasterio.io.DatasetReader'>" or str(inputType) == "<class 'geopandas.geodataframe.GeoDataFrame'>":
             crs_list = [x.crs.to_string() for x in input]
-            crs = numpy.unique(crs_list)
+            crs = np.unique(crs_list)
             consistency = True
             print(f"Input is Shapefile with consistent crs of {crs}")
             return consistency, crs[0]
@@ -273,9 +395,8 @@ def get_extent_local(input):
             - bound_poly (geopandas.GeoDataFrame): A GeoDataFrame containing a single polygon representing the bounding box.
 
     """
-    import rasterio
     import geopandas
-    from shapely.geometry import Polygon
+    from shapely.geometry import box
 
     #### Single file
     if (not isinstance(input, list)) or len(input)==1:
@@ -283,36 +404,18 @@ def get_extent_local(input):
             general_extent = input.bounds
             crs = input.crs
 
-            poly_geom = Polygon([
-                    (general_extent[0], general_extent[1]), 
-                    (general_extent[2], general_extent[1]), 
-                    (general_extent[2], general_extent[3]), 
-                    (general_extent[0], general_extent[3])
-                    ])
-            bound_poly = geopandas.GeoDataFrame(index=[0], geometry=[poly_geom])
-            bound_poly.crs = {'init': crs}
+            poly_geom = box(*general_extent)
+            bound_poly = geopandas.GeoDataFrame(index=[0], geometry=[poly_geom], crs=crs)
 
             return general_extent, bound_poly
 
         elif (isinstance(input, geopandas.geodataframe.GeoDataFrame)):
-            ext = input.bounds
+            # Total bounds of all polygons at once
+            general_extent = tuple(input.total_bounds)
             crs = input.crs
-            no_poly = ext.shape[0]
-                
-            # Determine general bound in case single polygon or multiple polygons
-            if no_poly == 1:
-                general_extent = tuple(ext.loc[0, :])
-            elif no_poly >= 2:
-                general_extent = (ext.iloc[:, 0].min(), ext.iloc[:, 1].min(), ext.iloc[:, 2].max(),ext.iloc[:, 3].max())
-
-            poly_geom = Polygon([
-                    (general_extent[0], general_extent[1]), 
-                    (general_extent[2], general_extent[1]), 
-                    (general_extent[2], general_extent[3]), 
-                    (general_extent[0], general_extent[3])
-                    ])
-            bound_poly = geopandas.GeoDataFrame(index=[0], geometry=[poly_geom])
-            bound_poly.crs = {'init': crs}
+
+            poly_geom = box(*general_extent)
+            bound_poly = geopandas.GeoDataFrame(index=[0], geometry=[poly_geom], crs=crs)
 
             return general_extent, bound_poly
             
@@ -325,72 +428,48 @@ def get_extent_local(input):
         
         # Input are Raster files
         if (consistency is True) and (datatype == "<class 'rasterio.io.DatasetReader'>"):
-            general_extent = None        
-            # read each file
-            for file in input:
-                ext = file.bounds
-                crs = file.crs                
-                
-                # determine general extent
-                if general_extent is None:
-                    general_extent = ext
-                else:
-                    general_extent =  (
-                        min(general_extent[0], ext[0]),
-                        min(general_extent[1], ext[1]),
-                        max(general_extent[2], ext[2]),
-                        max(general_extent[3], ext[3])
-                        )
-                    
-                # Create bound polygon
-                poly_geom = Polygon([
-                    (general_extent[0], general_extent[1]), 
-                    (general_extent[2], general_extent[1]), 
-                    (general_extent[2], general_extent[3]), 
-                    (general_extent[0], general_extent[3])
-                    ])
-                bound_poly = geopandas.GeoDataFrame(index=[0], geometry=[poly_geom])
-                bound_poly.crs = {'init': crs} 
+            # Collect bounds of all files in one array and reduce each column at once
+            bounds = np.empty((len(input), 4), dtype=np.float64)
+            for i, file in enumerate(input):
+                bounds[i] = file.bounds
+            crs = input[0].crs
+
+            # determine general extent
+            general_extent = (
+                float(bounds[:, 0].min()),
+                float(bounds[:, 1].min()),
+                float(bounds[:, 2].max()),
+                float(bounds[:, 3].max())
+                )
 
-                return general_extent, bound_poly
+            # Create bound polygon
+            poly_geom = box(*general_extent)
+            bound_poly = geopandas.GeoDataFrame(index=[0], geometry=[poly_geom], crs=crs)
+
+            return general_extent, bound_poly
 
         # Input are Shapefile files
         elif (consistency is True) and (datatype == "<class 'geopandas.geodataframe.GeoDataFrame'>"):
-            general_extent = None                        
-            # read each file
-            for file in input:
-                ext = file.bounds
-                crs = file.crs
-                no_poly = ext.shape[0]
-    
-                # Determine general bound in case single polygon or multiple polygons
-                if no_poly == 1:
-                    ext = tuple(ext.loc[0, :])
-                elif no_poly >= 2:
-                    ext = (ext.iloc[:, 0].min(), ext.iloc[:, 1].min(), ext.iloc[:, 2].max(),ext.iloc[:, 3].max())
-                
-                # determine general extent
-                if general_extent is None:
-                    general_extent = ext
-                else:
-                    general_extent =  (
-                        min(general_extent[0], ext[0]),
-                        min(general_extent[1], ext[1]),
-                        max(general_extent[2], ext[2]),
-                        max(general_extent[3], ext[3])
-                        )
-                
-                # Create bound polygon
-                poly_geom = Polygon([
-                    (general_extent[0], general_extent[1]), 
-                    (general_extent[2], general_extent[1]), 
-                    (general_extent[2], general_extent[3]), 
-                    (general_extent[0], general_extent[3])
-                    ])
-                bound_poly = geopandas.GeoDataFrame(index=[0], geometry=[poly_geom])
-                bound_poly.crs = {'init': crs} 
+            # Collect bounds of all files in one array and reduce each column at once
+            bounds = np.empty((len(input), 4), dtype=np.float64)
+            for i, file in enumerate(input):
+                # Total bounds of all polygons at once
+                bounds[i] = file.total_bounds
+            crs = input[0].crs
+
+            # determine general extent
+            general_extent = (
+                float(bounds[:, 0].min()),
+                float(bounds[:, 1].min()),
+                float(bounds[:, 2].max()),
+                float(bounds[:, 3].max())
+                )
 
-                return general_extent, bound_poly
+            # Create bound polygon
+            poly_geom = box(*general_extent)
+            bound_poly = geopandas.GeoDataFrame(index=[0], geometry=[poly_geom], crs=crs)
+
+            return general_extent, bound_poly
         
         # Other data types
         else:
@@ -410,7 +489,7 @@ def get_extent_external(input):
     Computes the spatial extent of geospatial files and returns the bounding box and a GeoDataFrame of the bounding polygon.
 
     Args:
-        input (str or list): A single file path or a list of file paths. Supported file types are GeoTIFF raster (tif) and shapefile (shp).
+        input (str or list): A single file path or a list of file paths, as strings or os.PathLike objects. Supported file types are GeoTIFF raster (tif) and shapefile (shp).
 
     Returns:
         tuple: A tuple containing:
@@ -419,61 +498,39 @@ def get_extent_external(input):
 
     """
     
-    import rasterio
     import geopandas
-    from shapely.geometry import Polygon
-    from .geonate import rast, vect
+    from shapely.geometry import box
+    from .geonate import vect
 
     #### Single path
     if (not isinstance(input, list)) or ((isinstance(input, list) and (len(input)==1))):
-        # Check whether single list or string
-        if len(input) == 1:
+        # Unwrap a single-item list, the path may be a string or os.PathLike
+        if isinstance(input, list):
             input = input[0]
-        else:
-            input = input
+        input = os.fspath(input)
 
         # Extract file extension
         extension = input.split(".")[-1]
 
         # Raster files
         if extension == 'tif':
-            tmp = rast(input)
-            general_extent = tmp.bounds
-            crs = tmp.crs
+            general_extent, crs = raster_bounds(input)
             # Create bound polygon
-            poly_geom = Polygon([
-                    (general_extent[0], general_extent[1]), 
-                    (general_extent[2], general_extent[1]), 
-                    (general_extent[2], general_extent[3]), 
-                    (general_extent[0], general_extent[3])
-                    ])
-            bound_poly = geopandas.GeoDataFrame(index=[0], geometry=[poly_geom])
-            bound_poly.crs = {'init': crs}
+            poly_geom = box(*general_extent)
+            bound_poly = geopandas.GeoDataFrame(index=[0], geometry=[poly_geom], crs=crs)
 
             return general_extent, bound_poly
         
         # Vector Shapefile 
         elif extension == 'shp':
             tmp = vect(input)
-            ext = tmp.bounds
+            # Total bounds of all polygons at once
+            general_extent = tuple(tmp.total_bounds)
             crs = tmp.crs
-            no_poly = ext.shape[0]
-                
-            # Determine general bound in case single polygon or multiple polygons
-            if no_poly == 1:
-                general_extent = tuple(ext.loc[0, :])
-            elif no_poly >= 2:
-                general_extent = (ext.iloc[:, 0].min(), ext.iloc[:, 1].min(), ext.iloc[:, 2].max(),ext.iloc[:, 3].max())
 
             # Create bound polygon
-            poly_geom = Polygon([
-                    (general_extent[0], general_extent[1]), 
-                    (general_extent[2], general_extent[1]), 
-                    (general_extent[2], general_extent[3]), 
-                    (general_extent[0], general_extent[3])
-                    ])
-            bound_poly = geopandas.GeoDataFrame(index=[0], geometry=[poly_geom])
-            bound_poly.crs = {'init': crs}
+            poly_geom = box(*general_extent)
+            bound_poly = geopandas.GeoDataFrame(index=[0], geometry=[poly_geom], crs=crs)
 
             return general_extent, bound_poly
 
@@ -489,76 +546,44 @@ def get_extent_external(input):
         if consistency is True:
             # Raster files
             if extension == 'tif':
-                files = [rast(file) for file in input]
-                general_extent = None 
+                # Only the header of each file is needed, open them concurrently as GDAL releases the GIL during I/O
+                with ThreadPoolExecutor(max_workers=min(32, len(input))) as executor:
+                    results = list(executor.map(raster_bounds, input))
 
-                # read each file
-                for file in files:
-                    ext = file.bounds
-                    crs = file.crs                
-                    
-                    # determine general extent
-                    if general_extent is None:
-                        general_extent = ext
-                    else:
-                        general_extent =  (
-                            min(general_extent[0], ext[0]),
-                            min(general_extent[1], ext[1]),
-                            max(general_extent[2], ext[2]),
-                            max(general_extent[3], ext[3])
-                            )
-                        
-                    # Create bound polygon
-                    poly_geom = Polygon([
-                        (general_extent[0], general_extent[1]), 
-                        (general_extent[2], general_extent[1]), 
-                        (general_extent[2], general_extent[3]), 
-                        (general_extent[0], general_extent[3])
-                        ])
-                    bound_poly = geopandas.GeoDataFrame(index=[0], geometry=[poly_geom])
-                    bound_poly.crs = {'init': crs} 
-
-                    return general_extent, bound_poly
+                # determine general extent, bounds are copied straight into one (N, 4) array and reduced two columns at a time
+                bounds = np.fromiter((value for ext, _ in results for value in ext), dtype=np.float64, count=4 * len(results)).reshape(-1, 4)
+                general_extent = (*map(float, bounds[:, :2].min(axis=0)), *map(float, bounds[:, 2:].max(axis=0)))
+                crs = results[0][1]
+
+                # Create bound polygon
+                poly_geom = box(*general_extent)
+                bound_poly = geopandas.GeoDataFrame(index=[0], geometry=[poly_geom], crs=crs)
+
+                return general_extent, bound_poly
 
             # Shapefile data
             elif extension == 'shp':
                 files = [vect(file) for file in input]
-                general_extent = None                        
-            
-                # read each file
-                for file in files:
-                    ext = file.bounds
-                    crs = file.crs
-                    no_poly = ext.shape[0]
-        
-                    # Determine general bound in case single polygon or multiple polygons
-                    if no_poly == 1:
-                        ext = tuple(ext.loc[0, :])
-                    elif no_poly >= 2:
-                        ext = (ext.iloc[:, 0].min(), ext.iloc[:, 1].min(), ext.iloc[:, 2].max(),ext.iloc[:, 3].max())
-                    
-                    # determine general extent
-                    if general_extent is None:
-                        general_extent = ext
-                    else:
-                        general_extent =  (
-                            min(general_extent[0], ext[0]),
-                            min(general_extent[1], ext[1]),
-                            max(general_extent[2], ext[2]),
-                            max(general_extent[3], ext[3])
-                            )
-                    
-                    # Create bound polygon
-                    poly_geom = Polygon([
-                        (general_extent[0], general_extent[1]), 
-                        (general_extent[2], general_extent[1]), 
-                        (general_extent[2], general_extent[3]), 
-                        (general_extent[0], general_extent[3])
-                        ])
-                    bound_poly = geopandas.GeoDataFrame(index=[0], geometry=[poly_geom])
-                    bound_poly.crs = {'init': crs} 
-
-                    return general_extent, bound_poly
+                # Collect bounds of all files in one array and reduce each column at once
+                bounds = np.empty((len(files), 4), dtype=np.float64)
+                for i, file in enumerate(files):
+                    # Total bounds of all polygons at once
+                    bounds[i] = file.total_bounds
+                crs = files[0].crs
+
+                # determine general extent
+                general_extent = (
+                    float(bounds[:, 0].min()),
+                    float(bounds[:, 1].min()),
+                    float(bounds[:, 2].max()),
+                    float(bounds[:, 3].max())
+                    )
+
+                # Create bound polygon
+                poly_geom = box(*general_extent)
+                bound_poly = geopandas.GeoDataFrame(index=[0], geometry=[poly_geom], crs=crs)
+
+                return general_extent, bound_poly
 
             # Other data types
             else:
@@ -583,13 +608,17 @@ def meter2degree(input, latitude=None):
         Degree (float): Degree corresponding to the distance length
 
     """
-    import numpy as np
 
     if latitude is None:
         # Equator location
-        degree = input / (111320 * np.cos(np.radians(0.0)))
+        degree = input / _EQUATOR_M_PER_DEG
+    elif np.ndim(latitude) == 0:
+        # Single latitude, including 0-d arrays, plain float math avoids numpy dispatch
+        degree = input / (_EQUATOR_M_PER_DEG * math.cos(math.radians(float(latitude))))
     else:
-        degree = input / (111320 * np.cos(np.radians(latitude)))
+        # Latitude arrays go through one buffer instead of a temporary per operation, reused for the result when shapes allow
+        length = _meters_per_degree(latitude)
+        degree = np.divide(input, length, out=_result_buffer(input, length))
     
     return degree
 
@@ -608,13 +637,17 @@ def degree2meter(input, latitude=None):
         Distance length (numeric | float): Distance in meters corresponding to the input degree
 
     """
-    import numpy as np
 
     if latitude is None:
         # Equator location
-        meters = input * (111320 * np.cos(np.radians(0.0)))
+        meters = input * _EQUATOR_M_PER_DEG
+    elif np.ndim(latitude) == 0:
+        # Single latitude, including 0-d arrays, plain float math avoids numpy dispatch
+        meters = input * (_EQUATOR_M_PER_DEG * math.cos(math.radians(float(latitude))))
     else:
-        meters = input * (111320 * np.cos(np.radians(latitude)))
+        # Latitude arrays go through one buffer instead of a temporary per operation, reused for the result when shapes allow
+        length = _meters_per_degree(latitude)
+        meters = np.multiply(input, length, out=_result_buffer(input, length))
     
     return meters
 
@@ -634,9 +667,6 @@ def center_scene(input):
             - center_lon (float): The center longitude of the input.
 
     """
-    import rasterio
-    import geopandas
-
     # Define boundary 
     bounds, _ = get_extent_local(input)
     min_lon, min_lat, max_lon, max_lat = bounds[0], bounds[1], bounds[2], bounds[3]
@@ -651,37 +681,75 @@ def center_scene(input):
 # =========================================================================================== #
 #              Return min and max values of array or raster
 # =========================================================================================== #
-def mimax(input, digit=3):
+def _nan_min_max(chunks):
+    """Min and max values ignoring NaN over chunks of data in one pass, both reductions run on a chunk while it is in cache
+
+    Args:
+        chunks (iterable): 1D arrays, e.g., from _flat_chunks
+
+    Returns:
+        tuple: Min and max values, NaN if all values are NaN
+
+    """
+    chunks = iter(chunks)
+    chunk = next(chunks)
+    minValue, maxValue = np.fmin.reduce(chunk), np.fmax.reduce(chunk)
+    for chunk in chunks:
+        minValue = np.fmin(minValue, np.fmin.reduce(chunk))
+        maxValue = np.fmax(maxValue, np.fmax.reduce(chunk))
+
+    return minValue, maxValue
+
+
+def _flat_chunks(array, step=1 << 16):
+    """Split an array into flat chunks small enough to stay in cache
+
+    Args:
+        array (np.ndarray): The data array
+        step (int, optional): Number of values in each chunk. Defaults to 65536.
+
+    Returns:
+        generator: Flat views of consecutive chunks, at least one even for an empty array
+
+    """
+    flat = np.ravel(array)
+    return (flat[start:start + step] for start in range(0, max(flat.size, 1), step))
+
+
+def mimax(input, digit=3, approx: bool=False):
     """Calculate maximum and minimum values of raster or array
 
     Args:
         input (raster | array): Raster image or data array
         digit (int, optional): Precise digit number. Defaults to 3.
+        approx (bool, optional): For raster input, estimate the values from a read decimated 16 times in each direction, served from overviews when the file has them, instead of scanning every pixel. Defaults to False.
 
     Returns:
         Min and Max values (numeric): Return 2 numbers of minvalue and maxvalue
 
     """
-    import rasterio
-    import numpy as np
 
     ### Check input data
-    if isinstance(input, rasterio.DatasetReader):
-        dataset = input.read()
+    # Decimated read of sampled pixels, GDAL picks a matching overview level if there is one
+    if isinstance(input, rasterio.DatasetReader) and (approx is True):
+        out_shape = (input.count, max(1, input.height // 16), max(1, input.width // 16))
+        chunks = _flat_chunks(input.read(out_shape=out_shape, resampling=rasterio.enums.Resampling.nearest))
+    # Raster is read block by block so the whole image is never held in memory
+    elif isinstance(input, rasterio.DatasetReader):
+        chunks = (np.ravel(input.read(window=window)) for _, window in input.block_windows(1))
     elif isinstance(input, np.ndarray):
-        dataset = input
+        chunks = _flat_chunks(input)
     else:
         raise ValueError('Input data is not supported')
     
-    # Calculate min and max values
-    minValue = round(np.nanmin(dataset), digit)
-    maxValue = round(np.nanmax(dataset), digit)
+    # Calculate min and max values in one pass, chunks stay in cache between the two reductions
+    minValue, maxValue = _nan_min_max(chunks)
 
-    # Convert min and max to string for print
-    min_round = str(round(minValue, digit))
-    max_round = str(round(maxValue, digit))
+    # Round once, the rounded values are both printed and returned
+    minValue = round(minValue, digit)
+    maxValue = round(maxValue, digit)
 
-    print(f"[Min: {min_round}  | Max: {max_round}]")
+    print(f"[Min: {minValue!s}  | Max: {maxValue!s}]")
 
     return minValue, maxValue
 
@@ -701,9 +769,7 @@ def unique_value(input, frequency=True, sort: Optional[AnyStr]='frequency'):
         array or dataframe: Array with unique value if frequency is False, otherwise it returns DataFrame with unique values and frequencies.
     
     """
-    import numpy as np
     import pandas as pd
-    import rasterio
     from .processor import values
 
     # Check input data
@@ -736,19 +802,20 @@ def unique_value(input, frequency=True, sort: Optional[AnyStr]='frequency'):
 # =========================================================================================== #
 #              Convert a numpy array and metadata to a rasterio object stored in local variable
 # =========================================================================================== #
-def array2raster(array, metadata: Dict):
+def array2raster(array, metadata: Dict, lazy: bool=False, scales: Optional[list]=None):
     """
     Convert a numpy array and metadata to a rasterio object stored in memory.
 
     Args:
         array (array): The input data array.
         metadata (Dict): The metadata dictionary.
+        lazy (bool, optional): Store the array uncompressed, skipping the compression set in metadata, so it is written and read back without encoding. Defaults to False.
+        scales (list, optional): Scale factor of each band stored with the raster, real values are the stored values times the scale. Defaults to None.
 
     Returns:
         Local raster file (raster): The rasterio object stored in memory.
 
     """
-    import rasterio
 
      # Determine number of bands
     if len(array.shape) == 3:
@@ -762,15 +829,20 @@ def array2raster(array, metadata: Dict):
         'count': nbands
     })
 
-    # Write image in memory file and read it back
+    # Write image in memory file and read it back, without compression when lazy
     memory_file = rasterio.MemoryFile()
-    dst = memory_file.open(**metadata)
+    if lazy is True:
+        dst = memory_file.open(**{key: value for key, value in metadata.items() if key not in ('compress', 'predictor', 'zstd_level')})
+    else:
+        dst = memory_file.open(**metadata)
 
     if array.ndim == 2:
         dst.write(array, 1)
     elif array.ndim == 3:
         for i in range(array.shape[0]):
             dst.write(array[i, :, : ], i + 1)
+    if scales is not None:
+        dst.scales = scales
     dst.close()
 
     # Read the dataset from memory
@@ -794,7 +866,6 @@ def  reshape_raster(inputArray, mode:str="image"):
         Reshape array (array): The reshaped array.
 
     """
-    import numpy as np
 
     # Check whether input are 3-dim data array
     if len(inputArray.shape) == 3:
@@ -3,8 +3,18 @@ Main module.
 
 """
 # import common packages 
+import os
+import shutil
+from importlib.util import find_spec
 from typing import AnyStr, Dict, Optional
 
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+# Only the functions are exported, geonate/__init__.py star-imports this module
+__all__ = ['rast', 'vect', 'writeRaster']
+
 ##############################################################################################
 
 # =========================================================================================== #
@@ -23,14 +33,11 @@ def rast(input: AnyStr, mode='r', show_meta: Optional[bool]=False, **kwargs):
         Raster object (raster): Rasterio RasterReader object
 
     """    
-    import rasterio
-    import os
-
     img = rasterio.open(input, mode= mode, **kwargs)
-    basename = os.path.basename(input)
     
     # show meta 
     if show_meta is True:
+        basename = os.path.basename(input)
         meta = img.meta
         print(f"Opening: {basename}\n{meta}")
     
@@ -46,14 +53,17 @@ def vect(input: AnyStr, show_meta: Optional[bool]=False, **kwargs):
     Args:
         input (AnyStr): The file path indicates location of shapefile 
         show_meta (bool, optional): Whether to show the image metadata. Defaults to False.
-        **kwargs (optional): All parameters in gpd.read_file()
+        **kwargs (optional): All parameters in gpd.read_file(), e.g., bbox to read only features in an area, or use_arrow=True for faster reads with pyogrio
 
     Returns:
         Shapefile (geodataframe): Geodataframe of shapefile with attributes from geopandas object
 
     """
     import geopandas as gpd
-    import os
+
+    # Read with pyogrio when available, it is much faster than fiona
+    if ('engine' not in kwargs) and (find_spec('pyogrio') is not None):
+        kwargs['engine'] = 'pyogrio'
     
     vect = gpd.read_file(input, **kwargs)
 
@@ -76,19 +86,16 @@ def writeRaster(input, output, meta: Optional[Dict]=None, compress: Optional[Any
         input (raster | array): Raster or Data array in form of [band, height, width]
         output (AnyStr): Output file path
         meta (Dict, optional): Rasterio profile settings needed when input is dataArray. Defaults to None.
-        compress (AnyStr, optional): Compression algorithm ['lzw', 'deflate']. Defaults to 'lzw'.
+        compress (AnyStr, optional): Compression algorithm ['lzw', 'deflate', 'zstd']. Defaults to 'lzw'.
 
     Returns:
         None: The function does not return any local variable. It writes raster file to local drive (.tif).
 
     """   
-    import rasterio
-    import numpy as np
   
     # Input is rasterio image
     if isinstance(input, rasterio.DatasetReader):
         meta_out = input.meta
-        data_array = input.read()
 
         # compress data or not
         if compress is None:
@@ -98,23 +105,33 @@ def writeRaster(input, output, meta: Optional[Dict]=None, compress: Optional[Any
                 meta_out.update({'compress': 'deflate'})
             elif compress.lower() == 'lzw':
                 meta_out.update({'compress': 'lzw'})
+            elif compress.lower() == 'zstd':
+                # Horizontal differencing for integers, floating point predictor for floats
+                predictor = 3 if np.issubdtype(meta_out['dtype'], np.floating) else 2
+                meta_out.update({'compress': 'zstd', 'zstd_level': 1, 'predictor': predictor})
             else:
                 raise ValueError('Compress method is not supported')
 
-        # output has single band
-        if len(data_array.shape) == 2:
-            meta_out['count'] = int(1)
-            with rasterio.open(output, 'w', **meta_out) as dst:
-                for band in range(0, 1):
-                    data = data_array
-                    dst.write(data, band + 1)
-        # output has multi bands
-        else:
-            meta_out['count'] = int(data_array.shape[0])
-            with rasterio.open(output, 'w', **meta_out) as dst:
-                for band in range(0, int(data_array.shape[0])):
-                    data = data_array[band, : , : ]
-                    dst.write(data, band + 1)
+        # Tiled layout serves windowed reads and lets GDAL compress blocks on all cores, BigTIFF is used when the file may exceed 4 GB
+        meta_out.update({'tiled': True, 'blockxsize': 512, 'blockysize': 512, 'num_threads': 'all_cpus', 'bigtiff': 'IF_SAFER'})
+
+        # Source file already has the requested layout and compression, copy its bytes without decoding and encoding again
+        layout = ('dtype', 'compress', 'predictor', 'tiled', 'blockxsize', 'blockysize')
+        src_profile = input.profile
+        # The profile does not report the predictor, GDAL lists it with the image structure when one is set
+        predictor = input.tags(ns='IMAGE_STRUCTURE').get('PREDICTOR')
+        src_profile['predictor'] = None if predictor in (None, '1') else predictor
+        if (input.driver == 'GTiff') and os.path.isfile(input.name) and (os.path.abspath(input.name) != os.path.abspath(output)) \
+                and all(str(src_profile.get(key)).lower() == str(meta_out.get(key)).lower() for key in layout):
+            shutil.copyfile(input.name, output)
+            return
+
+        # Copy in strips of 512 rows, one row of output tiles at a time, so the whole raster is never held in memory
+        meta_out['count'] = int(input.count)
+        with rasterio.open(output, 'w', **meta_out) as dst:
+            for row in range(0, input.height, 512):
+                window = Window(0, row, input.width, min(512, input.height - row))
+                dst.write(input.read(window=window), window=window)
 
     # input is data array
     elif isinstance(input, np.ndarray):
@@ -129,23 +146,27 @@ def writeRaster(input, output, meta: Optional[Dict]=None, compress: Optional[Any
                     meta.update({'compress': 'deflate'})
                 elif compress.lower() == 'lzw':
                     meta.update({'compress': 'lzw'})
+                elif compress.lower() == 'zstd':
+                    # Horizontal differencing for integers, floating point predictor for floats
+                    predictor = 3 if np.issubdtype(input.dtype, np.floating) else 2
+                    meta.update({'compress': 'zstd', 'zstd_level': 1, 'predictor': predictor})
                 else:
                     raise ValueError('Compress method is not supported')
 
+            # Tiled layout serves windowed reads and lets GDAL compress blocks on all cores, BigTIFF is used when the file may exceed 4 GB
+            meta.update({'tiled': True, 'blockxsize': 512, 'blockysize': 512, 'num_threads': 'all_cpus', 'bigtiff': 'IF_SAFER'})
+
             # output has single band
             if len(input.shape) == 2:
                 meta['count'] = int(1)
                 with rasterio.open(output, 'w', **meta) as dst:
-                    for band in range(0, 1):
-                        data = input
-                        dst.write(data, band + 1)
+                    dst.write(input, 1)
             # output has multi bands
             else:
                 meta['count'] = int(input.shape[0])
+                # Write all bands in one call instead of band by band
                 with rasterio.open(output, 'w', **meta) as dst:
-                    for band in range(0, int(input.shape[0])):
-                        data = input[band, : , : ]
-                        dst.write(data, band + 1)
+                    dst.write(input)
     else:
         raise ValueError('Input data is not supported')    
 
@@ -6,6 +6,9 @@ The visualization module
 
 from typing import AnyStr, Dict, Optional
 
+# Only the functions are exported, geonate/__init__.py star-imports this module
+__all__ = ['colormaps', 'DiscreteColors', 'plotMap', 'plot_bands', 'plotRGB', 'plot_raster']
+
 ##############################################################################################
 #                                                                                                                                                                                                          #
 #                       Main functions                                                                                                                                                         #
@@ -35,9 +38,9 @@ def colormaps():
     # Set figure size
     fig, ax = plt.subplots(figsize=(10, len(colormaps) * 0.25))
 
-    # Loop through colormaps and display them
-    for i, cmap in enumerate(colormaps):
-        ax.imshow(np.vstack([gradient] * 5), aspect='auto', cmap=cmap, extent=[0, 10, i, i + 1])
+    # Map the gradient through every colormap and display all of them as a single RGBA image
+    strips = np.concatenate([plt.get_cmap(cmap)(gradient) for cmap in colormaps], axis=0)
+    ax.imshow(np.repeat(strips, 5, axis=0), aspect='auto', origin='lower', extent=[0, 10, 0, len(colormaps)])
 
     # Formatting
     ax.set_yticks(np.arange(len(colormaps)) + 0.5)
@@ -171,10 +174,40 @@ def plotMap(image, cmap=None, figsize=(6,6), axis_off=False, colorbar=True, cbar
         plt.show()
 
 
+# =========================================================================================== #
+#               Read raster at display resolution
+# =========================================================================================== #
+def _read_preview(input, max_pixels=2_000_000, indexes=None):
+    """Read bands of a raster, decimated so that each band holds at most max_pixels pixels.
+    GDAL serves decimated reads from the internal overviews when the file has them.
+
+    Args:
+        input (DatasetReader): Rasterio image
+        max_pixels (int, optional): Maximum number of pixels per band, None reads the full resolution. Defaults to 2_000_000.
+        indexes (list, optional): Band indexes to read, starting at 1. Defaults to None, all bands.
+
+    Returns:
+        Data array (array): Array with shape (bands, rows, cols)
+
+    """
+    import math
+    from rasterio.enums import Resampling
+
+    # Full resolution read when the raster is already small enough
+    if (max_pixels is None) or (input.width * input.height <= max_pixels):
+        return input.read(indexes)
+
+    scale = math.ceil(math.sqrt(input.width * input.height / max_pixels))
+    nbands = input.count if indexes is None else len(indexes)
+    out_shape = (nbands, max(1, input.height // scale), max(1, input.width // scale))
+
+    return input.read(indexes, out_shape=out_shape, resampling=Resampling.average)
+
+
 # =========================================================================================== #
 #               Simple plot band           
 # =========================================================================================== #
-def plot_bands(input, cmap='Greys_r', cols=3, figsize=(10,10), cbar=True, **kwargs):
+def plot_bands(input, cmap='Greys_r', cols=3, figsize=(10,10), cbar=True, max_pixels=2_000_000, **kwargs):
     """Plot a raster image or data array using earthpy.
 
     Args:
@@ -183,6 +216,7 @@ def plot_bands(input, cmap='Greys_r', cols=3, figsize=(10,10), cbar=True, **kwar
         cols (int): Numbers of column on the plot. Defaults to cols = 3.
         figsize (numeric tuple): Width and Height. Defaults to (10, 10) inches.
         cbar (bool): Show color cbar. Defaults to True.  
+        max_pixels (int, optional): Maximum pixels per band read from a raster for display, None reads the full resolution. Defaults to 2_000_000.
         **kwargs (AnyStr, optional): All optional parameters taken from earthpy.plot.plot_bands(), such as cmap='Spectral' for color shade
 
     """
@@ -192,7 +226,7 @@ def plot_bands(input, cmap='Greys_r', cols=3, figsize=(10,10), cbar=True, **kwar
 
     ### Check input data
     if isinstance(input, rasterio.DatasetReader):
-        dataset = input.read()
+        dataset = _read_preview(input, max_pixels)
     elif isinstance(input, np.ndarray):
         dataset = input
     else:
@@ -205,7 +239,7 @@ def plot_bands(input, cmap='Greys_r', cols=3, figsize=(10,10), cbar=True, **kwar
 # =========================================================================================== #
 #               RGB composite plot
 # =========================================================================================== #
-def plotRGB(input, rgb=(0, 1, 2), stretch=True, str_clip: int = 2, figsize=(10,10), **kwargs):
+def plotRGB(input, rgb=(0, 1, 2), stretch=True, str_clip: int = 2, figsize=(10,10), max_pixels=2_000_000, **kwargs):
     """
     Plot a 3-band RGB image using earthpy.
 
@@ -215,6 +249,7 @@ def plotRGB(input, rgb=(0, 1, 2), stretch=True, str_clip: int = 2, figsize=(10,1
         stretch (bool, optional): Apply contrast stretching. Defaults to True.    
         str_clip (int): The percentage of clip to apply to the stretch. Default = 2 (2 and 98).  
         figsize (numeric tuple): Width and Height. Defaults to (10, 10) inches.
+        max_pixels (int, optional): Maximum pixels per band read from a raster for display, None reads the full resolution. Defaults to 2_000_000.
         **kwargs: Additional optional parameters for earthpy.plot.plot_rgb(), such as stretch=True for contrast stretching.
 
     """    
@@ -222,18 +257,20 @@ def plotRGB(input, rgb=(0, 1, 2), stretch=True, str_clip: int = 2, figsize=(10,1
     import rasterio
     import earthpy.plot as ep
 
-    ### Check input data
+    ### Check input data, band count is checked before any pixel is read
     if isinstance(input, rasterio.DatasetReader):
-        dataset = input.read()
+        if input.count <= 2:
+            raise ValueError('Image has only one band, please provide at least 3-band image')
+        # Read only the three bands to display
+        dataset = _read_preview(input, max_pixels, indexes=[i + 1 for i in rgb])
+        rgb = (0, 1, 2)
     elif isinstance(input, np.ndarray):
+        if len(input) <= 2:
+            raise ValueError('Image has only one band, please provide at least 3-band image')
         dataset = input
     else:
         raise ValueError('Input data is not supported')
     
-    # Check data dimension to make sure it is a multiple band image
-    if len(dataset) <= 2:
-        raise ValueError('Image has only one band, please provide at least 3-band image')
-    
     # Visualize the input dataset
     ep.plot_rgb(dataset, rgb= rgb, stretch=stretch, str_clip=str_clip, figsize=figsize, **kwargs)
 
@@ -5,6 +5,11 @@ The Post-processing module
 # import common packages 
 from typing import AnyStr, Dict, Optional
 
+import numpy as np
+import rasterio
+
+from .common import array2raster
+
 # =========================================================================================== #
 #              Reclassify image
 # =========================================================================================== #
@@ -21,9 +26,6 @@ def reclassify(input, breakpoints, classes):
         raster | dataArray: Reclassified result in raster or data array depending on input, containing all image pixel values
 
     """
-    import rasterio
-    import numpy as np
-    from .common import array2raster
 
     # *****************************************
     # Check input data
@@ -49,29 +51,33 @@ def reclassify(input, breakpoints, classes):
         raise ValueError('Input data is not supported')
 
     # *****************************************
-    # Create unique values and empty data array to store reclassified result 
-    uniques = np.unique(dataset)
-    reclassified = np.zeros_like(dataset)
-        
-    # *****************************************
-    # If image has discrete values
-    if len(uniques) == len(classes): 
-        if len(breakpoints) == len(classes):
-            for i in range(len(classes)):
-                reclassified[dataset == breakpoints[i]] = classes[i]
-        elif len(breakpoints) == (len(classes)-1):
-            for i in range(len(classes)):
-                reclassified[(dataset >= breakpoints[i]) & (dataset < breakpoints[i+1])] = classes[i]
+    # If image has discrete values, one breakpoint value per class
+    if len(breakpoints) == len(classes):
+        # Small non-negative integer images map through a lookup table indexed by pixel value
+        max_value = int(dataset.max()) if np.issubdtype(dataset.dtype, np.integer) and (dataset.size > 0) and (dataset.min() >= 0) else None
+        if (max_value is not None) and (max_value < 2**16):
+            values = np.asarray(breakpoints)
+            in_table = (values == np.round(values)) & (values >= 0) & (values <= max_value)
+            lut = np.zeros(max_value + 1, dtype=dataset.dtype)
+            lut[values[in_table].astype(np.int64)] = np.asarray(classes)[in_table]
+            reclassified = lut[dataset]
         else:
-            raise ValueError('Number of classes must be equal to number of breakpoints minus 1')
-        
-    # If image has continuous values
+            # Look up each pixel among the sorted breakpoints, pixels matching none of them stay 0
+            values = np.asarray(breakpoints)
+            order = np.argsort(values, kind='stable')
+            idx = np.searchsorted(values[order], dataset).clip(max=len(values) - 1)
+            matched = values[order][idx] == dataset
+            reclassified = np.where(matched, np.asarray(classes)[order][idx], 0).astype(dataset.dtype, copy=False)
+
+    # If breakpoints define intervals, discrete or continuous values
+    elif len(breakpoints) == (len(classes)+1):
+        # Binary search of the interval [breakpoints[i], breakpoints[i+1]) of each pixel in one pass, pixels outside all intervals stay 0
+        edges = np.asarray(breakpoints)
+        idx = np.searchsorted(edges, dataset, side='right') - 1
+        inside = (idx >= 0) & (idx < len(classes))
+        reclassified = np.where(inside, np.asarray(classes)[idx.clip(0, len(classes) - 1)], 0).astype(dataset.dtype, copy=False)
     else:
-        if len(breakpoints) == (len(classes)+1):
-            for i in range(len(classes)):
-                reclassified[(dataset >= breakpoints[i]) & (dataset < breakpoints[i+1])] = classes[i]
-        else:
-            raise ValueError('Number of classes must be equal to number of breakpoints minus 1')
+        raise ValueError('Number of classes must be equal to number of breakpoints minus 1')
     
     # *****************************************
     # Define output
@@ -100,7 +106,6 @@ def raster2shapefile(image, band=1):
 
     """
     import geopandas as gpd
-    import rasterio
     from rasterio.features import shapes
     from shapely.geometry import shape
 
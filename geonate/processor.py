@@ -4,16 +4,72 @@ The processor module
 
 """
 # import common packages 
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache
 from typing import AnyStr, Dict, Optional
 
+import numpy as np
+import rasterio
+import rasterio.errors
+import rasterio.features
+import rasterio.mask
+import rasterio.windows
+from rasterio import warp
+from rasterio.enums import Resampling
+from rasterio.transform import from_bounds
+from rasterio.vrt import WarpedVRT
+
+from .common import _flat_chunks, _nan_min_max, array2raster, check_datatype_consistency, check_extension_consistency, reshape_raster
+
 ##############################################################################################
 
+# =========================================================================================== #
+#              Resampling method names
+# =========================================================================================== #
+# Method names accepted by the resampling functions, mapped to rasterio.enums.Resampling members
+_RESAMPLING = {name: Resampling[member] for name, member in {
+    'near': 'nearest', 'nearest': 'nearest',
+    'mean': 'average', 'average': 'average',
+    'max': 'max', 'min': 'min',
+    'median': 'med', 'med': 'med',
+    'mode': 'mode', 'q1': 'q1', 'q3': 'q3',
+    'rsm': 'rms', 'rms': 'rms', 'sum': 'sum',
+    'cubic': 'cubic', 'spline': 'cubic_spline', 'bilinear': 'bilinear',
+    'gauss': 'gauss', 'lanczos': 'lanczos',
+}.items()}
+
+# Interpolating methods, which return the source values unchanged when pixel centres coincide
+_POINT_RESAMPLING = {Resampling.nearest, Resampling.bilinear, Resampling.cubic, Resampling.lanczos}
+
+def _resampling_method(method):
+    """Look up the rasterio resampling algorithm of a method name
+
+    Args:
+        method (AnyStr | Resampling): Resampling method name, e.g., 'near', 'bilinear', 'average', or a rasterio.enums.Resampling member used as it is
+
+    Returns:
+        Resampling (enum): The rasterio.enums.Resampling member
+
+    """
+
+    if isinstance(method, Resampling):
+        return method
+
+    resampleAlg = _RESAMPLING.get(method.lower())
+    if resampleAlg is None:
+        raise ValueError('The resampling method is not supported, available methods rasterio.warp.Resampling')
+
+    return resampleAlg
+
+
 # =========================================================================================== #
 #               Stack layer of geotif images
 # =========================================================================================== #
 def layestack(input):
     """
-    Stacks multiple raster files or rasterio DatasetReader objects into a single multi-band raster.
+    Stacks multiple raster files or rasterio DatasetReader objects into a single multi-band raster. To write a stack of files straight to disk without loading it, use stackVRT instead.
 
     Parameters:
         input (list): List of file paths to the input raster files or rasterio DatasetReader objects.
@@ -22,14 +78,11 @@ def layestack(input):
         Stacked raster (raster): Stacked raster image.
 
     """
-    import numpy as np
     from .geonate import rast
-    from .common import array2raster, check_datatype_consistency, check_extension_consistency
 
-    # Initialize some parameters and variables
-    file2stack = []
-    stacked_array = []
+    # Initialize some parameters and variables, reading is I/O bound so the worker count is not limited to the number of cores
     nbands = len(input)
+    workers = min(nbands, (os.cpu_count() or 1) + 4)
 
     consistency, datatype = check_datatype_consistency(input)
 
@@ -39,30 +92,51 @@ def layestack(input):
         
         # If input is a list of tif files
         if (consistency_ext is True) and (extension == 'tif'):
-            # Stack each band 
-            for i, bandi in enumerate(input):
-                tmp = rast(input[i])
-                ds = tmp.read(1) # Read each raster and read data array
-                meta = tmp.meta 
-                file2stack.append(ds) # stack each band in a list of data
+            # Open files concurrently, each opened handle is read by a single thread
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                sources = list(executor.map(rast, input))
+            opened = True
         # Other data extension
         else:
             raise ValueError('Data type is not supported')
     
     # If input is local raster files 
     elif (consistency is True) and datatype == "<class 'rasterio.io.DatasetReader'>":
-        # Stack each band 
-        for i, bandi in enumerate(input):
-            ds = input[i].read(1) # Read each band
-            meta = bandi.meta 
-            file2stack.append(ds) # stack each band in a list of data
+        sources = input
+        opened = False
     else:
         raise ValueError('Data type is not supported')    
 
-    # convert list to array and update nbands
-    stacked_array = np.stack(file2stack, axis=0) 
+    # Check dimensions from the headers, reading into a different shape would silently resample
+    if len(set(src.shape for src in sources)) > 1:
+        raise ValueError('Input rasters must have the same dimensions')
+
+    # Pre-allocate the output and read the first band of each raster directly into its slice
+    height, width = sources[0].shape
+    dtype = np.result_type(*[src.dtypes[0] for src in sources])
+    stacked_array = np.empty((nbands, height, width), dtype=dtype)
+
+    def read_band(i):
+        sources[i].read(1, out=stacked_array[i])
+
+    # GDAL releases the GIL while reading and decompressing, so rasters are read concurrently.
+    # A dataset handle is not thread safe, the same reader given twice is read sequentially
+    with rasterio.Env(GDAL_NUM_THREADS='ALL_CPUS'):
+        if len(set(map(id, sources))) == nbands:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(read_band, range(nbands)))
+        else:
+            for i in range(nbands):
+                read_band(i)
+
+    meta = sources[0].meta
     meta.update({'count': nbands})
 
+    # Close the files opened here
+    if opened is True:
+        for src in sources:
+            src.close()
+
     # Convert array to raster
     stacked_image = array2raster(stacked_array, meta)
 
@@ -73,7 +147,7 @@ def layestack(input):
 #               Merge  geotif files in a list using GDAL and VRT
 # =========================================================================================== #
 def mergeVRT(input: AnyStr, output: AnyStr, compress: bool=True, silent=True):
-    """Merge multiple geotif files using gdal VRT for better performance speed
+    """Merge multiple geotif files using gdal VRT for better performance speed. To stack files as separate bands, use layestack or stackVRT instead
 
     Args:
         input (list): List of input geotif files
@@ -85,27 +159,67 @@ def mergeVRT(input: AnyStr, output: AnyStr, compress: bool=True, silent=True):
         None: The function does not return any local variable. It writes raster file to local drive.
 
     """
-    import os
     from osgeo import gdal
-    #  Create a temp vrt file
-    vrt_file = 'merged.vrt'
+    # Mosaic options set explicitly: one band per input band (not one per file) and nearest resampling
+    vrt_options = gdal.BuildVRTOptions(resampleAlg='nearest', separate=False, allowProjectionDifference=False)
 
+    #  Build the vrt in memory, an empty name keeps the XML off the disk and avoids clashes between concurrent calls
+    vrt = gdal.BuildVRT('', input, options=vrt_options)
+    # Tiled output, BigTIFF when the file may exceed 4 GB, compressed or not
+    creation_options = ['TILED=YES', 'BIGTIFF=IF_SAFER']
     if compress is True:
-        vrt_options = gdal.BuildVRTOptions()
-        gdal.BuildVRT(vrt_file, input, options=vrt_options)
-        gdal.Translate(output, vrt_file, format='GTiff', creationOptions=['COMPRESS=LZW'])
+        # Tiled output is compressed on all cores through the NUM_THREADS creation option
+        gdal.Translate(output, vrt, format='GTiff', creationOptions=['COMPRESS=LZW', 'NUM_THREADS=ALL_CPUS'] + creation_options)
         
     else:
-        gdal.BuildVRT(vrt_file, input)
-        gdal.Translate(output, vrt_file)
+        gdal.Translate(output, vrt, format='GTiff', creationOptions=creation_options)
     
-    os.remove(vrt_file)
+    # Release the in-memory vrt
+    vrt = None
     if silent is True:
         pass
     else:
         print(f"Finished merge raster files, the output is at {output}")
     
 
+# =========================================================================================== #
+#              Stack geotif files as separate bands using VRT
+# =========================================================================================== #
+def stackVRT(input: AnyStr, output: AnyStr, compress: bool=True, silent=True):
+    """Stack multiple geotif files as separate bands of one file using gdal VRT, the data is streamed by GDAL without loading it like layestack does
+
+    Args:
+        input (list): List of input geotif files, the first band of each file is stacked
+        output (AnyStr): Path of output tif file
+        compress (bool, optional): Whether compress the output data or not. Defaults to True.
+        silent (bool, optional): Show or do not show file processing log. Defaults to True.
+    
+    Return:
+        None: The function does not return any local variable. It writes raster file to local drive.
+
+    """
+    from osgeo import gdal
+    # Each input file becomes its own band
+    vrt_options = gdal.BuildVRTOptions(resampleAlg='nearest', separate=True, bandList=[1])
+
+    #  Build the vrt in memory, an empty name keeps the XML off the disk and avoids clashes between concurrent calls
+    vrt = gdal.BuildVRT('', input, options=vrt_options)
+    # Tiled output, BigTIFF when the file may exceed 4 GB, compressed or not
+    creation_options = ['TILED=YES', 'BIGTIFF=IF_SAFER']
+    if compress is True:
+        # Tiled output is compressed on all cores through the NUM_THREADS creation option
+        gdal.Translate(output, vrt, format='GTiff', creationOptions=['COMPRESS=LZW', 'NUM_THREADS=ALL_CPUS'] + creation_options)
+    else:
+        gdal.Translate(output, vrt, format='GTiff', creationOptions=creation_options)
+    
+    # Release the in-memory vrt
+    vrt = None
+    if silent is True:
+        pass
+    else:
+        print(f"Finished stack raster files, the output is at {output}")
+
+
 # =========================================================================================== #
 #               Merge  geotif files in a list using Rasterio
 # =========================================================================================== #
@@ -114,42 +228,138 @@ def merge(input: list):
     Merges multiple raster files into a single raster file by computing the average values at overlapped areas.
 
     Args:
-        input (list): List of input raster files.
+        input (list): List of input raster files, as file paths or rasterio DatasetReader objects.
 
     Returns:
         A merged raster (raster): The merged raster file.
 
     """
     from rasterio import merge 
-    from .common import array2raster
 
-    # Initialize empty list to store all input files and stack input into it 
-    merged_files = []
-    for tmp in input:
-        merged_files.append(tmp)
+    # File paths are opened concurrently and closed once the mosaic is built, opened datasets are used as they are
+    paths = [i for i, src in enumerate(input) if isinstance(src, (str, os.PathLike))]
+    merged_files = list(input)
+    with ExitStack() as stack:
+        if paths:
+            with ThreadPoolExecutor(max_workers=min(len(paths), (os.cpu_count() or 1) + 4)) as executor:
+                for i, src in zip(paths, executor.map(rasterio.open, [input[i] for i in paths])):
+                    merged_files[i] = stack.enter_context(src)
+
+        # Accumulate sum in the first half of the output bands and count in the second half, in one pass over the inputs
+        def sum_count(merged_data, new_data, merged_mask, new_mask, **kwargs):
+            nbands = new_data.shape[0]
+            valid = ~new_mask
+            for part, value in ((merged_data[:nbands], new_data), (merged_data[nbands:], 1)):
+                np.copyto(part, 0, where=valid & np.isnan(part))
+                np.add(part, value, out=part, where=valid)
+
+        nbands = merged_files[0].count
+        mosaic, out_trans = merge.merge(merged_files, method=sum_count, output_count=2 * nbands, dtype='float64', nodata=np.nan)
+
+        # Average values at overlapped areas, pixels without data stay NaN. The sums are kept in float64, the average is returned as float32
+        mosaic_average = mosaic[:nbands]
+        mosaic_average /= mosaic[nbands:]
+        mosaic_average = mosaic_average.astype(np.float32)
+        del mosaic
+
+        # Update metadata with new transform and image dimensions
+        meta = merged_files[0].meta
+        meta.update({"driver": "GTiff",
+                                "height": mosaic_average.shape[1],
+                                "width": mosaic_average.shape[2],
+                                "transform": out_trans,
+                                "dtype": mosaic_average.dtype,
+                                "nodata": np.nan})
+
+        # Convert array to raster file
+        merged_raster = array2raster(mosaic_average, meta)
 
-    # Compute sum and count numbers of images, and average values at overlapped areas
-    mosaic_sum, out_trans = merge.merge(merged_files, method= merge.copy_sum)
-    mosaic_count, out_trans = merge.merge(merged_files, method= merge.copy_count)
-    mosaic_average = mosaic_sum / mosaic_count
+    return merged_raster    
 
-    # Update metadata with new transform and image dimensions
-    meta = merged_files[0].meta
-    meta.update({"driver": "GTiff",
-                            "height": mosaic_average.shape[1],
-                            "width": mosaic_average.shape[2],
-                            "transform": out_trans})
 
-    # Convert array to raster file
-    merged_raster = array2raster(mosaic_average, meta)
+# =========================================================================================== #
+#              Read a raster masked by shapes
+# =========================================================================================== #
+def _geometry_window(input, shapes):
+    """Window of a raster covering the bounds of shapes like rasterio.features.geometry_window, but bounds within 1e-6 pixel
+    of a pixel edge are snapped to it, so a box on the pixel grid does not gain a row or column of masked pixels from floating point noise
 
-    return merged_raster    
+    Args:
+        input (DatasetReader): Rasterio image
+        shapes (list): GeoJSON geometries
+
+    Returns:
+        Window: The window, intersected with the raster
+
+    """
+    all_bounds = [rasterio.features.bounds(shape, transform=~input.transform) for shape in shapes]
+    cols = [x for (left, bottom, right, top) in all_bounds for x in (left, right)]
+    rows = [y for (left, bottom, right, top) in all_bounds for y in (top, bottom)]
+
+    row_start, row_stop = int(np.floor(min(rows) + 1e-6)), int(np.ceil(max(rows) - 1e-6))
+    col_start, col_stop = int(np.floor(min(cols) + 1e-6)), int(np.ceil(max(cols) - 1e-6))
+    window = rasterio.windows.Window(col_start, row_start, max(col_stop - col_start, 0), max(row_stop - row_start, 0))
+
+    try:
+        return window.intersection(rasterio.windows.Window(0, 0, input.width, input.height))
+    except rasterio.errors.WindowError:
+        raise ValueError('Input shapes do not overlap raster.')
+
+
+def _mask_read(input, shapes, nodata_value, dtype, crop=True, invert=False):
+    """Mask a raster by shapes like rasterio.mask.mask, but cast to the output data type while reading so no converted copy of the whole image is needed
+
+    Args:
+        input (DatasetReader): Rasterio image to mask
+        shapes (list): GeoJSON geometries of the mask
+        nodata_value (numeric): Value of pixels outside the shapes and of nodata pixels of the input
+        dtype (str | np.dtype): Output data type
+        crop (bool, optional): Read only the window covering the shapes. Defaults to True.
+        invert (bool, optional): Mask pixels inside the shapes instead. Defaults to False.
+
+    Returns:
+        tuple: Masked data array and its transform
+
+    """
+    if crop is True:
+        window = _geometry_window(input, shapes)
+        transform = input.window_transform(window)
+        shape_mask = rasterio.features.geometry_mask(shapes, out_shape=(window.height, window.width), transform=transform, invert=invert)
+    else:
+        shape_mask, transform, window = rasterio.mask.raster_geometry_mask(input, shapes, invert=invert, crop=False)
+    out_image = input.read(window=window, out_dtype=dtype, masked=True)
+    out_image.mask = out_image.mask | shape_mask
+
+    return out_image.filled(nodata_value), transform
+
+
+def _mask_nodata(input, nodata=True, as_float=True):
+    """Pick output data type and nodata value for crop and mask
+
+    Args:
+        input (DatasetReader): Rasterio image to mask
+        nodata (bool, optional): Whether nodata values are handled. Defaults to True.
+        as_float (bool, optional): If False, integer inputs keep their data type, with their own nodata value or the largest value of the data type. Defaults to True.
+
+    Returns:
+        tuple: Output data type and nodata value
+
+    """
+    dtype = input.dtypes[0]
+    if nodata is not True:
+        return dtype, 0
+    # Integer input kept as is, float32 would double or quadruple the output size
+    if (as_float is False) and np.issubdtype(dtype, np.integer):
+        nodata_value = input.nodata if input.nodata is not None else np.iinfo(dtype).max
+        return dtype, nodata_value
+    # Convert datatype of input to float32 to store NA value, the window is cast while it is read
+    return np.float32, np.nan
 
 
 # =========================================================================================== #
 #              Crop raster using shapefile or another image
 # =========================================================================================== #
-def crop(input, reference, invert=False, nodata=True):
+def crop(input, reference, invert=False, nodata=True, as_float=True):
     """
     Crops a raster file based on a reference shapefile or raster file. Optionally inverts the crop.
 
@@ -158,80 +368,64 @@ def crop(input, reference, invert=False, nodata=True):
         reference (shapefile | raster): The reference shapefile (GeoDataFrame) or raster file (DatasetReader) to define the crop boundary.
         invert (bool, optional): If True, inverts the crop to mask out the area within the boundary. Defaults to False.
         nodata (bool, optional): If True, handles nodata values by converting the input to float32 and setting nodata to NaN. Defaults to True.
+        as_float (bool, optional): If False, integer inputs keep their data type, masked with their own nodata value or the largest value of the data type, instead of being converted to float32. Defaults to True.
 
     Returns:
         A clipped raster (raster): The cropped raster file.
         
     """
-    import rasterio
     import geopandas as gpd
-    import numpy as np
-    from rasterio.transform import Affine
     from shapely.geometry import mapping
     from shapely.geometry import box
-    from .common import array2raster
     
     # Condition to process nodata
-    if nodata is True:
-        # Convert datatype of input to float32 to store NA value
-        arr = input.read().astype(np.float32)
-        meta = input.meta
-        meta.update({'dtype': np.float32})
-        input_image = array2raster(arr, meta)
-    else: 
-        input_image = input
+    dtype, nodata_value = _mask_nodata(input, nodata, as_float)
 
     ### Define boundary
     # Reference is shapefile
     if isinstance(reference, gpd.GeoDataFrame):
         minx, miny, maxx, maxy = reference.total_bounds
-        # define box
+        # define box, a single GeoJSON shape is all rasterio.mask needs
         bbox = box(minx, miny, maxx, maxy)
-        poly_bound = gpd.GeoDataFrame({'geometry': [bbox]}, crs=reference.crs)
+        shapes = [mapping(bbox)]
 
     # Reference is raster
     elif isinstance(reference, rasterio.DatasetReader):
         minx, miny, maxx, maxy = reference.bounds
-        # define box
+        # define box, a single GeoJSON shape is all rasterio.mask needs
         bbox = box(minx, miny, maxx, maxy)
-        poly_bound = gpd.GeoDataFrame({'geometry': [bbox]}, crs=reference.crs)
+        shapes = [mapping(bbox)]
 
     # Others
     else:
         raise ValueError('Reference data is not supported')   
 
     ### Invert crop
-    #### Condition for nodata
-    if nodata is True:
-        if invert is True:
-            clipped, geotranform = rasterio.mask.mask(dataset=input_image, shapes= poly_bound.geometry.apply(mapping), invert=True, nodata= np.nan)
-        else:
-            clipped, geotranform = rasterio.mask.mask(dataset=input_image, shapes= poly_bound.geometry.apply(mapping), crop=True, invert=False, nodata= np.nan)
-        
-        # Update metadata
-        meta  = input.meta
-        meta.update({
-            'height': clipped.shape[1],
-            'width': clipped.shape[2],
-            'transform': geotranform,
-            'dtype': np.float32,
-            'nodata': np.nan
-            })
-    #
+    if invert is True:
+        clipped, geotranform = _mask_read(input, shapes, nodata_value, dtype, crop=False, invert=True)
     else:
-        if invert is True:
-            clipped, geotranform = rasterio.mask.mask(dataset=input_image, shapes= poly_bound.geometry.apply(mapping), invert=True, nodata= 0)
+        # A box aligned to the pixel grid and inside the raster is a plain windowed read, no polygon to rasterize
+        window = rasterio.windows.from_bounds(minx, miny, maxx, maxy, transform=input.transform)
+        bounds = (window.col_off, window.row_off, window.width, window.height)
+        aligned = np.allclose(bounds, np.round(bounds), atol=1e-6)
+        col, row, width, height = (int(value) for value in np.round(bounds))
+        inside = (col >= 0) and (row >= 0) and (width > 0) and (height > 0) and (col + width <= input.width) and (row + height <= input.height)
+        if aligned and inside:
+            window = rasterio.windows.Window(col, row, width, height)
+            clipped = input.read(window=window, out_dtype=dtype, masked=True).filled(nodata_value)
+            geotranform = input.window_transform(window)
         else:
-            clipped, geotranform = rasterio.mask.mask(dataset=input_image, shapes= poly_bound.geometry.apply(mapping), crop=True, invert=False, nodata= 0)
-        
-        # Update metadata
-        meta  = input.meta
-        meta.update({
-            'height': clipped.shape[1],
-            'width': clipped.shape[2],
-            'transform': geotranform,
-            'nodata': 0
-            })
+            clipped, geotranform = _mask_read(input, shapes, nodata_value, dtype, crop=True, invert=False)
+    
+    # Update metadata
+    meta  = input.meta
+    meta.update({
+        'dtype': dtype,
+        'height': clipped.shape[1],
+        'width': clipped.shape[2],
+        'transform': geotranform,
+        'nodata': nodata_value
+        })
    
     # Convert array to raster
     clipped_raster = array2raster(clipped, meta)
@@ -241,7 +435,7 @@ def crop(input, reference, invert=False, nodata=True):
 # =========================================================================================== #
 #              Mask raster using shapefile or another image
 # =========================================================================================== #
-def mask(input, reference, invert=False, nodata=True):
+def mask(input, reference, invert=False, nodata=True, as_float=True):
     """ 
     Masks a raster file based on a reference shapefile or raster file. Optionally inverts the mask.
 
@@ -250,91 +444,51 @@ def mask(input, reference, invert=False, nodata=True):
         reference (shapefile | raster): The reference shapefile (GeoDataFrame) or raster file (DatasetReader) to define the mask boundary.
         invert (bool, optional): If True, inverts the mask to mask out the area within the boundary. Defaults to False.
         nodata (bool, optional): If True, handles nodata values by converting the input to float32 and setting nodata to NaN. Defaults to True.
+        as_float (bool, optional): If False, integer inputs keep their data type, masked with their own nodata value or the largest value of the data type, instead of being converted to float32. Defaults to True.
 
     Returns:
         A clipped and masked raster (raster): The cropped and masked raster file.
         
     """
-    import numpy as np
-    import rasterio
-    import shapely
     from shapely.geometry import mapping
     import geopandas as gpd
-    from .common import array2raster
 
     ##########################################
-    #### Define boundary 
+    #### Define boundary, as GeoJSON mappings of the mask polygons for rasterio.mask
     if (isinstance(reference, gpd.GeoDataFrame)):
-        poly = reference
-        transform_poly = reference.transform
-        crs_poly = reference.crs
+        shapes = [mapping(geom) for geom in reference.geometry.array]
 
     # Raster format
     elif isinstance(reference, rasterio.DatasetReader):
-        ds_reference = reference.read(1)                                        # Extract only first band, transform, and crs
+        ds_reference = reference.read(1)                                        # Extract only first band and transform
         transform_poly = reference.meta['transform']
-        crs_poly = reference.meta['crs']
 
-        # Create mask from all value different from Nodata
-        masked = np.where(np.isnan(ds_reference), np.nan, 1)            # Replace values different than NA by 1
-        masked_convert = masked.astype(np.float32)                             # Redefine data type of float32 to store n.nan
+        # Create mask from all value different from Nodata, valid pixels are 1
+        valid = ~np.isnan(ds_reference)
         
-        # Create generator that yields (geometry, value) pairs for each shape found in the masked_convert
-        shp = rasterio.features.shapes(masked_convert, mask= ~np.isnan(masked_convert), transform= transform_poly)
-        poly = []
-        values = []
-
-        # Iterate over mask = 1, convert to shapely geometry and append 
-        for shape, value in shp:
-            if value == 1:
-                poly.append(shapely.geometry.shape(shape))                         # convert a GeoJSON-like dictionary object into a Shapely geometry object
-                values.append(value)
-        
-        # Create poly from mask
-        poly = gpd.GeoDataFrame({'geometry': poly, 'value': values})
-        poly.set_crs(crs_poly.to_string(), inplace=True)
+        # Polygonize valid pixels, a uint8 view of the boolean mask avoids another copy.
+        # Only valid pixels are polygonized so every shape has value 1, 8-connectivity joins diagonal neighbours into fewer polygons.
+        # The GeoJSON geometries are passed straight to rasterio.mask
+        shp = rasterio.features.shapes(valid.view(np.uint8), mask= valid, connectivity=8, transform= transform_poly)
+        shapes = [shape for shape, value in shp]
 
     else:
         raise ValueError('Reference data is not supported')
-    
+
     ##########################################
     ### Define nodata
-    if nodata is True:
-        # Convert datatype of input to float32 to store NA value
-        arr = input.read().astype(np.float32)
-        meta = input.meta
-        meta.update({'dtype': np.float32})
-        input_image = array2raster(arr, meta)
+    dtype, nodata_value = _mask_nodata(input, nodata, as_float)
 
-        ### Invert mask
-        if invert is True:
-            masked_img, geotranform = rasterio.mask.mask(dataset=input_image, shapes= poly.geometry.apply(mapping), crop=True, invert=True, nodata=np.nan)
-        else:
-            masked_img, geotranform = rasterio.mask.mask(dataset=input_image, shapes= poly.geometry.apply(mapping), crop=True, nodata= np.nan)
-
-        meta  = input_image.meta
-        meta.update({
-            'height': masked_img.shape[1],
-            'width': masked_img.shape[2],
-            'transform': geotranform,
-            'dtype': np.float32,
-            'nodata': np.nan})
+    ### Invert mask
+    masked_img, geotranform = _mask_read(input, shapes, nodata_value, dtype, crop=True, invert=invert)
 
-    else: 
-        input_image = input
-
-        ### Invert mask
-        if invert is True:
-            masked_img, geotranform = rasterio.mask.mask(dataset=input_image, shapes= poly.geometry.apply(mapping), crop=True, invert=True, nodata= 0)
-        else:
-            masked_img, geotranform = rasterio.mask.mask(dataset=input_image, shapes= poly.geometry.apply(mapping), crop=True, nodata= 0)
-
-        meta  = input_image.meta
-        meta.update({
-            'height': masked_img.shape[1],
-            'width': masked_img.shape[2],
-            'transform': geotranform,
-            'nodata': 0})
+    meta  = input.meta
+    meta.update({
+        'dtype': dtype,
+        'height': masked_img.shape[1],
+        'width': masked_img.shape[2],
+        'transform': geotranform,
+        'nodata': nodata_value})
 
     ### Convert array back to raster         
     masked_raster = array2raster(masked_img, meta)
@@ -354,21 +508,17 @@ def reproject(input, reference, method: Optional[AnyStr]='near', res: Optional[f
         reference (raster | shapefile): The reference CRS for reprojection. It can be a string (e.g., 'EPSG:4326') or a rasterio DatasetReader object. If None, the input CRS is used.
         method (AnyStr, optional): The resampling method to use. Default is 'near'. Supported methods include 'nearest', 'average', 'max', 'min', 'median', 'mode', 'q1', 'q3', 'rms', 'sum', 'cubic', 'cubic_spline', 'bilinear', 'gauss', 'lanczos'.
         res (numeric, optional): The output resolution. If None, the input resolution is used.
-        **kwargs (optional): All parameters that can be passed to rasterio.warp.reproject function.
+        **kwargs (optional): All parameters that can be passed to rasterio.warp.reproject function, e.g., num_threads (GDAL warp threads, all CPUs by default) and warp_mem_limit (MB, 512 by default).
 
     Returns:
         raster: The reprojected raster image
         
     """
-    import numpy as np
-    import rasterio
-    from rasterio import warp
-    from .common import array2raster
     
     # *********************************************
-    # Define input image
-    input_image = input.read()
+    # Define input image, pixels are warped straight from the dataset without reading a full copy first
     meta = input.meta
+    nbands = input.count
     left, bottom, right, top = input.bounds
     
     # *********************************************
@@ -380,11 +530,6 @@ def reproject(input, reference, method: Optional[AnyStr]='near', res: Optional[f
             raise ValueError('Please provide output resolution')
         else:
             xsize, ysize = res, res
-        # Transform to new transform
-        transform_new, width_new, height_new = warp.calculate_default_transform(src_crs=meta['crs'], dst_crs=dst_crs, \
-                                                                                                                                                height=meta['height'], width=meta['width'], \
-                                                                                                                                                resolution=(xsize, ysize), \
-                                                                                                                                                left=left, bottom=bottom, right=right, top=top)
     # Take all paras from reference image
     elif isinstance(reference, rasterio.DatasetReader):
         dst_crs = reference.crs
@@ -392,15 +537,20 @@ def reproject(input, reference, method: Optional[AnyStr]='near', res: Optional[f
             xsize, ysize = reference.res
         else:
             xsize, ysize = res, res
-        # Transform to new transform
-        transform_new, width_new, height_new = warp.calculate_default_transform(src_crs=meta['crs'], dst_crs=dst_crs, \
-                                                                                                                                                height=meta['height'], width=meta['width'], \
-                                                                                                                                                resolution=(xsize, ysize), \
-                                                                                                                                                left=left, bottom=bottom, right=right, top=top)
     # Other cases
     else:
         raise ValueError('Please define correct reference, it is CRS string or an image reference')
 
+    # Same CRS and resolution is a no-op, skip the warp entirely
+    if (dst_crs == meta['crs']) and (abs(xsize - meta['transform'][0]) < 1e-9) and (abs(ysize - abs(meta['transform'][4])) < 1e-9):
+        return input
+
+    # Transform to new transform
+    transform_new, width_new, height_new = warp.calculate_default_transform(src_crs=meta['crs'], dst_crs=dst_crs, \
+                                                                                                                                            height=meta['height'], width=meta['width'], \
+                                                                                                                                            resolution=(xsize, ysize), \
+                                                                                                                                            left=left, bottom=bottom, right=right, top=top)
+
     # *******************************************
     # Update metadata
     meta_update = meta.copy()
@@ -412,49 +562,18 @@ def reproject(input, reference, method: Optional[AnyStr]='near', res: Optional[f
     })
     # *******************************************
     # Resampling method
-    if method.lower() == 'near' or method.lower() == 'nearest':
-        resampleAlg = warp.Resampling.nearest
-    elif method.lower() == 'mean' or method.lower() == 'average':
-        resampleAlg = warp.Resampling.average
-    elif method.lower() == 'max':
-        resampleAlg = warp.Resampling.max
-    elif method.lower() == 'min':
-        resampleAlg = warp.Resampling.min
-    elif (method.lower() == 'median') or (method.lower() == 'med'):
-        resampleAlg = warp.Resampling.med
-    elif method.lower() == 'mode':
-        resampleAlg = warp.Resampling.mode
-    elif method.lower() == 'q1':
-        resampleAlg = warp.Resampling.q1
-    elif method.lower() == 'q3':
-        resampleAlg = warp.Resampling.q3
-    elif method.lower() == 'rsm':
-        resampleAlg = warp.Resampling.rms
-    elif method.lower() == 'sum':
-        resampleAlg = warp.Resampling.sum
-    elif method.lower() == 'cubic':
-        resampleAlg = warp.Resampling.cubic
-    elif method.lower() == 'spline':
-        resampleAlg = warp.Resampling.cubic_spline
-    elif method.lower() == 'bilinear':
-        resampleAlg = warp.Resampling.bilinear
-    elif method.lower() == 'gauss':
-        resampleAlg = warp.Resampling.gauss
-    elif method.lower() == 'lanczos':
-        resampleAlg = warp.Resampling.lanczos
-    else:
-        raise ValueError('The resampling method is not supported, available methods rasterio.warp.Resampling')
+    resampleAlg = _resampling_method(method)
 
     # ***************************************
-    # Running reproject 
-    projected_array = np.empty((input_image.shape[0], height_new, width_new), dtype= meta['dtype'])
-    for band in range(0, input_image.shape[0]):
-        ds = input_image[band, : , : ]
-        warp.reproject(source=ds, destination=projected_array[(band), :, :], \
-                       src_transform= meta['transform'], dst_transform=transform_new, \
-                        src_crs=meta['crs'], dst_crs=dst_crs, \
-                        resampling= resampleAlg,
-                        **kwargs)
+    # Running reproject, all bands in one call reading from the source dataset. GDAL warps chunks on all cores unless set by the caller
+    kwargs.setdefault('num_threads', os.cpu_count() or 1)
+    kwargs.setdefault('warp_mem_limit', 512)
+    projected_array = np.empty((nbands, height_new, width_new), dtype= meta['dtype'])
+    warp.reproject(source=rasterio.band(input, list(range(1, nbands + 1))), destination=projected_array, \
+                   src_transform= meta['transform'], dst_transform=transform_new, \
+                    src_crs=meta['crs'], dst_crs=dst_crs, \
+                    resampling= resampleAlg,
+                    **kwargs)
     
     # *****************************************
     # Convert array back to raster
@@ -466,7 +585,7 @@ def reproject(input, reference, method: Optional[AnyStr]='near', res: Optional[f
 # =========================================================================================== #
 #              Resample raster image based on factor
 # =========================================================================================== #
-def resample(input, factor, mode='aggregate', method='near', **kwargs):
+def resample(input, factor, mode='aggregate', method='near', output: Optional[AnyStr]=None, **kwargs):
     """
     Resample raster image based on factor
 
@@ -475,22 +594,18 @@ def resample(input, factor, mode='aggregate', method='near', **kwargs):
         factor (numeric): Resampling factor compared to original image (e.g., 2, 4, 6).
         mode (str, optional): Resample mode ["aggregate", "disaggregate"]. Defaults to 'aggregate'.
         method (str, optional): Resampling method (e.g., 'nearest', 'cubic', 'bilinear', 'average'). Defaults to 'near'.
-        **kwargs (optional): All parameters that can be passed to rasterio.warp.reproject function.
+        output (AnyStr, optional): GeoTIFF path. The result is warped and written in strips of 512 rows, so it is never held in memory as a whole. Defaults to None.
+        **kwargs (optional): All parameters that can be passed to rasterio.warp.reproject function, e.g., num_threads (GDAL warp threads, all CPUs by default) and warp_mem_limit (MB, 512 by default).
 
     Returns:
-        raster: Resampled raster image.        
+        raster: Resampled raster image. The written raster if output is given.
 
     """
-    import rasterio
-    from rasterio import warp
-    import numpy as np
-    from .common import array2raster
 
     # *****************************************
     ### Define input image
     # input is raster
     if isinstance(input, rasterio.DatasetReader):
-        dataset = input.read()
         meta = input.meta
         left, bottom, right, top = input.bounds
         nbands = input.count
@@ -511,44 +626,19 @@ def resample(input, factor, mode='aggregate', method='near', **kwargs):
     else:
         raise ValueError('Resample method is not supported ["aggregate", "disaggregate"]')
 
+    # Factor of 1 keeps the same grid, nothing to resample. The input is still written when an output path is given
+    if factor == 1:
+        if output is not None:
+            return _write_row_strips(output, meta, lambda window: input.read(window=window))
+        return input
+
     # *****************************************
     # Calculate new transform
     transform_new, width, height = warp.calculate_default_transform(src_crs=meta['crs'], dst_crs=meta['crs'], width=new_width, height=new_height, left=left, bottom=bottom, right=right, top=top)
 
     # *****************************************
     # Resampling method
-    if method.lower() == 'near' or method.lower() == 'nearest':
-        resampleAlg = warp.Resampling.nearest
-    elif method.lower() == 'mean' or method.lower() == 'average':
-        resampleAlg = warp.Resampling.average
-    elif method.lower() == 'max':
-        resampleAlg = warp.Resampling.max
-    elif method.lower() == 'min':
-        resampleAlg = warp.Resampling.min
-    elif (method.lower() == 'median') or (method.lower() == 'med'):
-        resampleAlg = warp.Resampling.med
-    elif method.lower() == 'mode':
-        resampleAlg = warp.Resampling.mode
-    elif method.lower() == 'q1':
-        resampleAlg = warp.Resampling.q1
-    elif method.lower() == 'q3':
-        resampleAlg = warp.Resampling.q3
-    elif method.lower() == 'rsm':
-        resampleAlg = warp.Resampling.rms
-    elif method.lower() == 'sum':
-        resampleAlg = warp.Resampling.sum
-    elif method.lower() == 'cubic':
-        resampleAlg = warp.Resampling.cubic
-    elif method.lower() == 'spline':
-        resampleAlg = warp.Resampling.cubic_spline
-    elif method.lower() == 'bilinear':
-        resampleAlg = warp.Resampling.bilinear
-    elif method.lower() == 'gauss':
-        resampleAlg = warp.Resampling.gauss
-    elif method.lower() == 'lanczos':
-        resampleAlg = warp.Resampling.lanczos
-    else:
-        raise ValueError('The resampling method is not supported, available methods raster.Resampling.')
+    resampleAlg = _resampling_method(method)
 
     # *****************************************
     # Define and Update the metadata for the destination raster
@@ -561,22 +651,25 @@ def resample(input, factor, mode='aggregate', method='near', **kwargs):
     })
 
     # *****************************************
-    # Run Resampling for each band
-    resampled = np.empty((nbands, new_height, new_width), dtype=np.float32)
-
-    for band in range(0, nbands):
-        if nbands <= 1:
-            ds = dataset
-        else:
-            ds = dataset[band, : , : ]
-
-        warp.reproject(source=ds, destination=resampled[band, :, :], \
-                       src_transform= meta['transform'], dst_transform= transform_new, \
+    # Run Resampling for all bands in one call reading from the source dataset. GDAL warps chunks on all cores unless set by the caller
+    kwargs.setdefault('num_threads', os.cpu_count() or 1)
+    kwargs.setdefault('warp_mem_limit', 512)
+
+    def resampled(window):
+        """Resampled values on a window of the new grid"""
+        data = np.empty((nbands, int(window.height), int(window.width)), dtype=np.float32)
+        warp.reproject(source=rasterio.band(input, list(range(1, nbands + 1))), destination=data, \
+                       src_transform= meta['transform'], dst_transform= rasterio.windows.transform(window, transform_new), \
                         src_crs=meta['crs'], dst_crs=input.crs, resampling= resampleAlg, **kwargs)
+        return data
+
+    # Write to file strip by strip
+    if output is not None:
+        return _write_row_strips(output, metadata, resampled)
 
     # *****************************************
     # Convert array to raster 
-    resampled_raster = array2raster(resampled, metadata)
+    resampled_raster = array2raster(resampled(rasterio.windows.Window(0, 0, new_width, new_height)), metadata)
 
     return resampled_raster
 
@@ -591,23 +684,17 @@ def match_boundary(input, reference, method='near', **kwargs):
         input (raster): Rasterio objective needs to match the reference.
         reference (raster): Rasterio object taken as reference to match the input image.
         method (AnyStr, optional): String defines resampling method (if applicable) to resample if having different resolution (Method similar to resample). Defaults to 'near'.
-        **kwargs (optional): All parameters that can be passed to rasterio.warp.reproject function.
+        **kwargs (optional): All parameters that can be passed to rasterio.vrt.WarpedVRT, e.g., warp_mem_limit (MB, 512 by default), plus num_threads (GDAL warp threads, all CPUs by default).
 
     Returns:
         raster: Matched raster image with the same projection, resolution, and extent as the reference image.
 
     """
-    import rasterio
-    from rasterio import warp
-    from rasterio.transform import from_bounds
-    import numpy as np
-    from .common import get_extent_local, array2raster
     
     # *****************************************
     ### Define input image
     # input is raster
     if isinstance(input, rasterio.DatasetReader):
-        input_image = input.read()
         meta = input.meta
     # Other input
     else:
@@ -616,7 +703,6 @@ def match_boundary(input, reference, method='near', **kwargs):
     # *****************************************
     ### Define reference image
     if isinstance(reference, rasterio.DatasetReader):
-        reference_image = reference.read()
         meta_reference = reference.meta
     # Other input
     else:
@@ -630,9 +716,9 @@ def match_boundary(input, reference, method='near', **kwargs):
     else:
         
         # *****************************************
-        # Get general extent from two images
-        ext_input = get_extent_local(input)[0]
-        ext_reference = get_extent_local(reference)[0]
+        # Get general extent from two images, bounds come from the transform and shape without touching pixels
+        ext_input = input.bounds
+        ext_reference = reference.bounds
         
         ext = ext_input
         ext = (
@@ -645,66 +731,37 @@ def match_boundary(input, reference, method='near', **kwargs):
         # *****************************************
         # Calculate new height & width and new transform
         resolution = meta_reference['transform'][0]    
-        width_new = int((ext[2]  - ext[0]) / resolution)
-        height_new = int((ext[3] - ext[1]) / resolution)
+        width_new = int(round((ext[2]  - ext[0]) / resolution))
+        height_new = int(round((ext[3] - ext[1]) / resolution))
     
         transform_new = from_bounds(ext[0], ext[1], ext[2], ext[3], width_new, height_new)
         
         # *****************************************
         # Resampling method
-        if method.lower() == 'near' or method.lower() == 'nearest':
-            resampleAlg = warp.Resampling.nearest
-        elif method.lower() == 'mean' or method.lower() == 'average':
-            resampleAlg = warp.Resampling.average
-        elif method.lower() == 'max':
-            resampleAlg = warp.Resampling.max
-        elif method.lower() == 'min':
-            resampleAlg = warp.Resampling.min
-        elif (method.lower() == 'median') or (method.lower() == 'med'):
-            resampleAlg = warp.Resampling.med
-        elif method.lower() == 'mode':
-            resampleAlg = warp.Resampling.mode
-        elif method.lower() == 'q1':
-            resampleAlg = warp.Resampling.q1
-        elif method.lower() == 'q3':
-            resampleAlg = warp.Resampling.q3
-        elif method.lower() == 'rsm':
-            resampleAlg = warp.Resampling.rms
-        elif method.lower() == 'sum':
-            resampleAlg = warp.Resampling.sum
-        elif method.lower() == 'cubic':
-            resampleAlg = warp.Resampling.cubic
-        elif method.lower() == 'spline':
-            resampleAlg = warp.Resampling.cubic_spline
-        elif method.lower() == 'bilinear':
-            resampleAlg = warp.Resampling.bilinear
-        elif method.lower() == 'gauss':
-            resampleAlg = warp.Resampling.gauss
-        elif method.lower() == 'lanczos':
-            resampleAlg = warp.Resampling.lanczos
-        else:
-            raise ValueError('The resampling method is not supported, available methods raster.Resampling.')
+        resampleAlg = _resampling_method(method)
 
         # *****************************************
-        # Reproject to match
-        if len(input_image.shape) > 2:
-            nbands = input_image.shape[0]
+        # Reproject to match, the input is warped through a virtual dataset so GDAL reads only the source chunks it needs
+        nbands = input.count
+        # GDAL warp options are keyword arguments of WarpedVRT, they are collected in a dict and passed unpacked
+        warp_extras = kwargs.pop('warp_extras', {})
+        warp_extras.setdefault('NUM_THREADS', kwargs.pop('num_threads', 'ALL_CPUS'))
+        kwargs.setdefault('warp_mem_limit', 512)
+
+        # Zero pixels are taken as nodata, they and the area outside the input are written as NaN
+        kwargs.setdefault('src_nodata', 0)
+        kwargs.setdefault('nodata', kwargs.pop('dst_nodata', np.nan))
+
+        # Input already on the output grid (same CRS checked above), the warp is skipped
+        if (input.shape == (height_new, width_new)) and input.transform.almost_equals(transform_new):
+            matched = input.read(out_dtype=np.float32)
+            matched[matched == kwargs['src_nodata']] = np.nan
         else:
-            nbands = 1
-        # Run over each band
-        matched = np.empty((nbands, height_new, width_new), dtype=np.float32)
-        for band in range(0, nbands):
-            if nbands <= 1:
-                ds = input_image
-            else:
-                ds = input_image[band, : , : ]
-            warp.reproject(source=ds, destination=matched[band, :, :], src_transform= meta['transform'], dst_transform= transform_new, src_crs=meta['crs'], dst_crs=meta_reference['crs'], resampling= resampleAlg, **kwargs)
+            matched = np.empty((nbands, height_new, width_new), dtype=np.float32)
+            with WarpedVRT(input, crs=meta_reference['crs'], transform=transform_new, width=width_new, height=height_new, \
+                            resampling=resampleAlg, dtype='float32', **warp_extras, **kwargs) as vrt:
+                vrt.read(out=matched)
         
-        # *****************************************
-        # Mask out other values
-        match_masked = np.where(matched == 0, np.nan, matched)
-        match_masked = match_masked.astype(np.float32)
-
         # *****************************************
         # Update metadata and Convert to raster
         meta_update = meta.copy()
@@ -715,7 +772,7 @@ def match_boundary(input, reference, method='near', **kwargs):
             'height': height_new,
             'dtype': np.float32
         })
-        match_raster = array2raster(match_masked, meta_update)
+        match_raster = array2raster(matched, meta_update)
         
         return match_raster
     
@@ -723,7 +780,7 @@ def match_boundary(input, reference, method='near', **kwargs):
 # =========================================================================================== #
 #              Matching two images to have the same boundary
 # =========================================================================================== #
-def match(input, reference, method='near', nodata=None, **kwargs):
+def match(input, reference, method='near', nodata=None, output: Optional[AnyStr]=None, **kwargs):
     """
     Match input image to the reference image in terms of projection, resolution, and bound extent.
 
@@ -731,23 +788,18 @@ def match(input, reference, method='near', nodata=None, **kwargs):
         input (raster): Rasterio objective needs to match the reference.
         reference (raster): Rasterio object taken as reference to match the input image.
         method (AnyStr, optional): String defines resampling method (if applicable) to resample if having different resolution (Method similar to resample). Defaults to 'near'.
-        **kwargs (optional): All parameters that can be passed to rasterio.warp.reproject function.
+        output (AnyStr, optional): GeoTIFF path. The result is matched and written in strips of 512 rows, so it is never held in memory as a whole. Defaults to None.
+        **kwargs (optional): All parameters that can be passed to rasterio.warp.reproject function, e.g., num_threads (GDAL warp threads, all CPUs by default) and warp_mem_limit (MB, 512 by default).
 
     Returns:
-        raster: Matched raster image with the same projection, resolution, and extent as the reference image.
+        raster: Matched raster image with the same projection, resolution, and extent as the reference image. The written raster if output is given.
 
     """
-    import rasterio
-    from rasterio import warp
-    from rasterio.transform import from_bounds
-    import numpy as np
-    from .common import get_extent_local, array2raster
     
     # *****************************************
     ### Define input image
     # input is raster
     if isinstance(input, rasterio.DatasetReader):
-        input_image = input.read()
         src_meta = input.meta
         src_crs = input.crs
         src_count = input.count
@@ -760,7 +812,6 @@ def match(input, reference, method='near', nodata=None, **kwargs):
     # *****************************************
     ### Define reference image
     if isinstance(reference, rasterio.DatasetReader):
-        reference_image = reference.read()
         reference_meta = reference.meta
         reference_transform = reference.transform
         reference_width = reference.width
@@ -783,86 +834,211 @@ def match(input, reference, method='near', nodata=None, **kwargs):
         'dtype': src_dtype
         })
     
-    # Allocate destination array
-    dst_data = np.empty(shape=(src_count, reference_height, reference_width), dtype= input.dtypes[0])
+    # *****************************************
+    # Output data type, other values are masked out as NaN when nodata is given
+    if (nodata is None):
+        output_meta.update({
+            'dtype': input.dtypes[0]
+            })
+    elif (isinstance(nodata, (int, float))):
+        output_meta.update({
+            'dtype': np.float32,
+            'nodata': np.nan
+            })            
+    else: 
+        raise ValueError('NoData is not supported (int or float)')        
 
     # *****************************************
     # Resampling method
-    if method.lower() == 'near' or method.lower() == 'nearest':
-        resampleAlg = warp.Resampling.nearest
-    elif method.lower() == 'mean' or method.lower() == 'average':
-        resampleAlg = warp.Resampling.average
-    elif method.lower() == 'max':
-        resampleAlg = warp.Resampling.max
-    elif method.lower() == 'min':
-        resampleAlg = warp.Resampling.min
-    elif (method.lower() == 'median') or (method.lower() == 'med'):
-        resampleAlg = warp.Resampling.med
-    elif method.lower() == 'mode':
-        resampleAlg = warp.Resampling.mode
-    elif method.lower() == 'q1':
-        resampleAlg = warp.Resampling.q1
-    elif method.lower() == 'q3':
-        resampleAlg = warp.Resampling.q3
-    elif method.lower() == 'rsm':
-        resampleAlg = warp.Resampling.rms
-    elif method.lower() == 'sum':
-        resampleAlg = warp.Resampling.sum
-    elif method.lower() == 'cubic':
-        resampleAlg = warp.Resampling.cubic
-    elif method.lower() == 'spline':
-        resampleAlg = warp.Resampling.cubic_spline
-    elif method.lower() == 'bilinear':
-        resampleAlg = warp.Resampling.bilinear
-    elif method.lower() == 'gauss':
-        resampleAlg = warp.Resampling.gauss
-    elif method.lower() == 'lanczos':
-        resampleAlg = warp.Resampling.lanczos
-    else:
-        raise ValueError('The resampling method is not supported, available methods raster.Resampling.')
+    resampleAlg = _resampling_method(method)
 
     # *****************************************
-    # Reproject each band
-    for i in range(src_count):
-        warp.reproject(
-            source= input_image[i],
-            destination= dst_data[i],
-            src_transform= src_transform,
-            src_crs= src_crs,
-            dst_transform= reference_transform,
-            dst_crs= reference_crs,
-            resampling= resampleAlg, **kwargs
-        )
+    # Same projection and pixel size with the reference grid shifted by whole pixels, interpolating kernels then sample source pixel centres
+    # and the warp reduces to copying the overlapping window. Pixels outside the input are filled with its nodata value as the warp does
+    col_off, row_off = ~src_transform * (reference_transform.c, reference_transform.f)
+    aligned = (src_crs == reference_crs) and (not kwargs) and (resampleAlg in _POINT_RESAMPLING) \
+        and np.allclose([src_transform.a, src_transform.b, src_transform.d, src_transform.e],
+                        [reference_transform.a, reference_transform.b, reference_transform.d, reference_transform.e], rtol=1e-9, atol=0) \
+        and (abs(col_off - round(col_off)) < 1e-6) and (abs(row_off - round(row_off)) < 1e-6)
+    col_off, row_off = int(round(col_off)), int(round(row_off))
+
+    kwargs.setdefault('num_threads', os.cpu_count() or 1)
+    kwargs.setdefault('warp_mem_limit', 512)
+
+    def matched(window):
+        """Values of the input on a window of the reference grid"""
+        height, width = int(window.height), int(window.width)
+        dst_data = np.empty(shape=(src_count, height, width), dtype= input.dtypes[0])
+
+        # Copy the overlapping part of the input for aligned grids
+        if aligned:
+            top, left = row_off + int(window.row_off), col_off + int(window.col_off)
+            dst_data.fill(0 if input.nodata is None else input.nodata)
+            rows = slice(max(top, 0), min(top + height, input.height))
+            cols = slice(max(left, 0), min(left + width, input.width))
+            if (rows.start < rows.stop) and (cols.start < cols.stop):
+                src_window = rasterio.windows.Window(cols.start, rows.start, cols.stop - cols.start, rows.stop - rows.start)
+                dst_data[:, rows.start - top:rows.stop - top, cols.start - left:cols.stop - left] = input.read(window=src_window)
+
+        # Reproject all bands in one call reading from the source dataset, GDAL warps chunks on all cores unless set by the caller
+        else:
+            warp.reproject(
+                source= rasterio.band(input, list(range(1, src_count + 1))),
+                destination= dst_data,
+                src_transform= src_transform,
+                src_crs= src_crs,
+                dst_transform= rasterio.windows.transform(window, reference_transform),
+                dst_crs= reference_crs,
+                resampling= resampleAlg, **kwargs
+            )
 
-        # *****************************************
-        # Mask out other values
-        if (nodata is None):
-            dst_data = dst_data
-            output_meta.update({
-                'dtype': input.dtypes[0]
-                })
-        elif (isinstance(nodata, (int, float))):
-            dst_data = np.where(dst_data == nodata, np.nan, dst_data)
-            dst_data = dst_data.astype(np.float32)
-
-            output_meta.update({
-                'dtype': np.float32,
-                'nodata': np.nan
-                })            
-        else: 
-            raise ValueError('NoData is not supported (int or float)')        
+        # Mask out other values, cast once (no copy when already float32) and set nodata pixels to NaN in place
+        if nodata is not None:
+            is_nodata = dst_data == nodata
+            dst_data = dst_data.astype(np.float32, copy=False)
+            np.putmask(dst_data, is_nodata, np.nan)
 
-        # *****************************************
-        # Convert to raster        
-        match_raster = array2raster(dst_data, output_meta)
-        
-        return match_raster
+        return dst_data
+
+    # Write to file strip by strip
+    if output is not None:
+        return _write_row_strips(output, output_meta, matched)
+
+    # *****************************************
+    # Convert to raster        
+    match_raster = array2raster(matched(rasterio.windows.Window(0, 0, reference_width, reference_height)), output_meta)
+    
+    return match_raster
    
 
+# =========================================================================================== #
+#              Pixel kernels over row strips
+# =========================================================================================== #
+# Arrays above this size are computed in parallel row strips of roughly _STRIP_PIXELS pixels, small enough for the temporaries to stay in cache
+_PARALLEL_PIXELS = 4_000_000
+_STRIP_PIXELS = 262_144
+
+def _map_row_strips(kernel, out, *arrays):
+    """Run a pixel kernel over row strips of 2D arrays on all cores, or in one call for small arrays
+
+    Args:
+        kernel (callable): Function called as kernel(*strips, out_strip), writing its result into out_strip
+        out (np.ndarray): 2D output array
+        *arrays (np.ndarray): 2D input arrays with the same shape as out
+
+    """
+    rows, cols = out.shape
+    if out.size < _PARALLEL_PIXELS or rows < 2:
+        kernel(*arrays, out)
+        return
+
+    step = max(1, _STRIP_PIXELS // max(1, cols))
+    strips = [slice(r, r + step) for r in range(0, rows, step)]
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+        list(executor.map(lambda strip: kernel(*(array[strip] for array in arrays), out[strip]), strips))
+
+
+def _normalized_difference(band1, band2, out):
+    """Write (band1 - band2) / (band1 + band2) into out in float32, NaN where the denominator is zero or the index is outside [-1, 1]
+
+    Args:
+        band1 (np.ndarray): First band values
+        band2 (np.ndarray): Second band values
+        out (np.ndarray): Float32 output array with the same shape as the bands
+
+    """
+    # The numerator is written straight into out, so the denominator is the only temporary
+    np.subtract(band1, band2, out=out, dtype=np.float32)
+    denominator = np.add(band1, band2, dtype=np.float32)
+    zero = denominator == 0
+    np.divide(out, denominator, out=out, where=~zero)
+    np.putmask(out, zero | (np.abs(out) > 1), np.nan)
+
+
+# Indices bounded to [-1, 1] are stored as int16 values multiplied by a scale, NaN becomes the int16 minimum used as nodata
+_INDEX_NODATA = np.iinfo(np.int16).min
+
+def _index_precision(scale):
+    """Output data type, nodata value and scale factor of an index stored with an integer scale
+
+    Args:
+        scale (int): Multiplier of the int16 stored values, e.g., 10000. None to keep float32
+
+    Returns:
+        tuple: Data type, nodata value (None for float32) and scales for one band (None for float32)
+
+    """
+    if scale is None:
+        return np.float32, None, None
+    elif 0 < scale <= np.iinfo(np.int16).max:
+        return np.int16, _INDEX_NODATA, [1 / scale]
+    else:
+        raise ValueError("Scale must be between 1 and 32767 so values in [-1, 1] fit in int16")
+
+
+def _quantize_index(index, scale):
+    """Convert a float32 index array to int16 values multiplied by scale, the array is modified in place
+
+    Args:
+        index (np.ndarray): Float32 index values within [-1, 1], NaN for no data
+        scale (int): Multiplier of the int16 stored values. None to keep float32
+
+    Returns:
+        np.ndarray: The converted array
+
+    """
+    if scale is not None:
+        np.multiply(index, scale, out=index)
+        np.rint(index, out=index)
+        np.nan_to_num(index, copy=False, nan=_INDEX_NODATA)
+        index = index.astype(np.int16)
+    return index
+
+
+# Rasters computed with an output path are processed and written in strips of this many rows, one row of output tiles
+_OUTPUT_ROWS = 512
+
+def _row_strip_windows(height, width):
+    """Windows covering a raster grid in strips of 512 rows
+
+    Args:
+        height (int): Number of rows of the grid
+        width (int): Number of columns of the grid
+
+    Returns:
+        list: Windows of the strips from top to bottom
+
+    """
+    return [rasterio.windows.Window(0, row, width, min(_OUTPUT_ROWS, height - row)) for row in range(0, height, _OUTPUT_ROWS)]
+
+
+def _write_row_strips(output, meta, compute, scales=None):
+    """Compute a raster strip by strip and write it to a tiled GeoTIFF, only one strip is held in memory
+
+    Args:
+        output (AnyStr): Output file path
+        meta (Dict): Metadata of the output raster, defining its grid
+        compute (callable): Function called as compute(window), returning the output values of the window in form of (bands, rows, cols)
+        scales (list, optional): Scale factor of each output band. Defaults to None.
+
+    Returns:
+        raster: The written raster opened for reading
+
+    """
+    meta = dict(meta, driver='GTiff', compress='lzw', tiled=True, blockxsize=512, blockysize=512, bigtiff='IF_SAFER')
+    with rasterio.open(output, 'w', **meta) as dst:
+        for window in _row_strip_windows(meta['height'], meta['width']):
+            dst.write(compute(window), window=window)
+        if scales is not None:
+            dst.scales = scales
+
+    return rasterio.open(output)
+
+
 # =========================================================================================== #
 #              Calculate normalized difference index 
 # =========================================================================================== #
-def normalizedDifference(input, band1, band2):
+def normalizedDifference(input, band1, band2, scale: Optional[int]=None, output: Optional[AnyStr]=None):
     """
     Calculate normalized difference index
 
@@ -870,46 +1046,59 @@ def normalizedDifference(input, band1, band2):
         input (Raster | Array): Rasterio object or data array, input with multiple bands.
         band1 (numeric): Order of the first band in the input.
         band2 (numeric): Order of the second band in the input.
+        scale (int, optional): Store the index as half-size int16 values multiplied by scale, e.g., 10000, with nodata -32768, real index = value * raster.scales[0]. Defaults to None for float32 output.
+        output (AnyStr, optional): GeoTIFF path for raster input. The index is computed and written in strips of 512 rows, so the input is never held in memory as a whole. Defaults to None.
 
     Returns:
-        raster | dataArray: Normalized difference result in raster or data array depending on input, containing all image pixel values
+        raster | dataArray: Normalized difference result in raster or data array depending on input, containing all image pixel values. The written raster if output is given
 
     """
-    import numpy as np
-    import rasterio
-    from .common import array2raster
+
+    dtype, nodata, scales = _index_precision(scale)
 
     # *****************************************
-    # Define data input
-    # input is raster
+    # Define data input and extract band values
+    # input is raster, only the two bands used are read
     if isinstance(input, rasterio.DatasetReader):
-        dataset = input.read()
+        bands = range(1, input.count + 1)
+        indexes = [bands[band1+1], bands[band2+1]]
         meta = input.meta
+        meta.update({'dtype': dtype, 'count': 1})                                                       #  update datatype in metadata 
+        if nodata is not None:
+            meta.update({'nodata': nodata})
+
+        # Write to file strip by strip
+        if output is not None:
+            def compute(window):
+                ds_band1, ds_band2 = input.read(indexes, window=window)
+                normalized_index = np.empty(ds_band1.shape, dtype=np.float32)
+                _normalized_difference(ds_band1, ds_band2, normalized_index)
+                return _quantize_index(normalized_index, scale)[np.newaxis]
+
+            return _write_row_strips(output, meta, compute, scales)
+
+        ds_band1, ds_band2 = input.read(indexes)
     # input is array
     elif isinstance(input, np.ndarray):
-        dataset = input
+        if output is not None:
+            raise ValueError('Output path is only supported for raster input')
+        ds_band1 = input[band1+1, : , : ]
+        ds_band2 = input[band2+1, : , : ]
         meta = None
     # Other input
     else:
         raise ValueError('Input data is not supported')
 
     # *****************************************
-    # Extract band values
-    ds_band1 = dataset[band1+1, : , : ]
-    ds_band2 = dataset[band2+1, : , : ]
-
-    # *****************************************
-    # Calculate index and Remove outliers, also
-    normalized_index  = (ds_band1.astype(float) - ds_band2.astype(float)) / (ds_band1 + ds_band2)
-    normalized_index = normalized_index.astype(np.float32)
-
-    normalized_index[(normalized_index < -1) | (normalized_index > 1)] = np.nan
+    # Calculate index and remove outliers, large scenes are split into row strips computed on all cores
+    normalized_index = np.empty(ds_band1.shape, dtype=np.float32)
+    _map_row_strips(_normalized_difference, normalized_index, ds_band1, ds_band2)
+    normalized_index = _quantize_index(normalized_index, scale)
 
     # *****************************************
     # Define output 
     if isinstance(input, rasterio.DatasetReader):
-        meta.update({'dtype': np.float32, 'count': 1})                                                  #  update datatype in metadata 
-        normalized_output = array2raster(normalized_index, meta)
+        normalized_output = array2raster(normalized_index, meta, scales=scales)
     elif isinstance(input, np.ndarray):
         normalized_output = normalized_index
     else:
@@ -934,9 +1123,6 @@ def reclassify(input, breakpoints, classes):
         raster | dataArray: Reclassified result in raster or data array depending on input, containing all image pixel values
 
     """
-    import rasterio
-    import numpy as np
-    from .common import array2raster
 
     # *****************************************
     # Check input data
@@ -962,29 +1148,33 @@ def reclassify(input, breakpoints, classes):
         raise ValueError('Input data is not supported')
 
     # *****************************************
-    # Create unique values and empty data array to store reclassified result 
-    uniques = np.unique(dataset)
-    reclassified = np.zeros_like(dataset)
-        
-    # *****************************************
-    # If image has discrete values
-    if len(uniques) == len(classes): 
-        if len(breakpoints) == len(classes):
-            for i in range(len(classes)):
-                reclassified[dataset == breakpoints[i]] = classes[i]
-        elif len(breakpoints) == (len(classes)-1):
-            for i in range(len(classes)):
-                reclassified[(dataset >= breakpoints[i]) & (dataset < breakpoints[i+1])] = classes[i]
+    # If image has discrete values, one breakpoint value per class
+    if len(breakpoints) == len(classes):
+        # Small non-negative integer images map through a lookup table indexed by pixel value
+        max_value = int(dataset.max()) if np.issubdtype(dataset.dtype, np.integer) and (dataset.size > 0) and (dataset.min() >= 0) else None
+        if (max_value is not None) and (max_value < 2**16):
+            values = np.asarray(breakpoints)
+            in_table = (values == np.round(values)) & (values >= 0) & (values <= max_value)
+            lut = np.zeros(max_value + 1, dtype=dataset.dtype)
+            lut[values[in_table].astype(np.int64)] = np.asarray(classes)[in_table]
+            reclassified = lut[dataset]
         else:
-            raise ValueError('Number of classes must be equal to number of breakpoints minus 1')
-        
-    # If image has continuous values
+            # Look up each pixel among the sorted breakpoints, pixels matching none of them stay 0
+            values = np.asarray(breakpoints)
+            order = np.argsort(values, kind='stable')
+            idx = np.searchsorted(values[order], dataset).clip(max=len(values) - 1)
+            matched = values[order][idx] == dataset
+            reclassified = np.where(matched, np.asarray(classes)[order][idx], 0).astype(dataset.dtype, copy=False)
+
+    # If breakpoints define intervals, discrete or continuous values
+    elif len(breakpoints) == (len(classes)+1):
+        # Binary search of the interval [breakpoints[i], breakpoints[i+1]) of each pixel in one pass, pixels outside all intervals stay 0
+        edges = np.asarray(breakpoints)
+        idx = np.searchsorted(edges, dataset, side='right') - 1
+        inside = (idx >= 0) & (idx < len(classes))
+        reclassified = np.where(inside, np.asarray(classes)[idx.clip(0, len(classes) - 1)], 0).astype(dataset.dtype, copy=False)
     else:
-        if len(breakpoints) == (len(classes)+1):
-            for i in range(len(classes)):
-                reclassified[(dataset >= breakpoints[i]) & (dataset < breakpoints[i+1])] = classes[i]
-        else:
-            raise ValueError('Number of classes must be equal to number of breakpoints minus 1')
+        raise ValueError('Number of classes must be equal to number of breakpoints minus 1')
     
     # *****************************************
     # Define output
@@ -1013,8 +1203,6 @@ def values(input, na_rm: Optional[bool]=True, names: Optional[list]=None, prefix
         DataFrame: Dataframe stores all pixel values across all image bands.
 
     """
-    import rasterio
-    import numpy as np
     import pandas as pd
 
     # *****************************************
@@ -1030,9 +1218,9 @@ def values(input, na_rm: Optional[bool]=True, names: Optional[list]=None, prefix
         raise ValueError('Input data is not supported')
     
     # *****************************************
-    # Define parameters
+    # Define parameters, each band flattened as a row of one 2D view
     nbands = dataset.shape[0]
-    bands_array = [dataset[band, : , : ].flatten() for band in range(0, nbands)]
+    bands_array = np.ascontiguousarray(dataset).reshape(nbands, -1)
     
     # *****************************************
     # Assign column names in case name is given 
@@ -1041,23 +1229,26 @@ def values(input, na_rm: Optional[bool]=True, names: Optional[list]=None, prefix
             raise ValueError('Length of name should be equal to number of bands')
         else:
             if prefix is None:
-                data = pd.DataFrame(np.array(bands_array).T, columns=names)
+                columns = names
             else:
-                names_new = [f'{prefix}{name}' for name in names]
-                data = pd.DataFrame(np.array(bands_array).T, columns=names_new)
+                columns = [f'{prefix}{name}' for name in names]
     # If name is not given
     else:
         if prefix is None:
-            data = pd.DataFrame(np.array(bands_array).T, columns=[f'B{i}' for i in range(1,nbands +1)])
+            columns = [f'B{i}' for i in range(1,nbands +1)]
         else:
-            data = pd.DataFrame(np.array(bands_array).T, columns=[f'{prefix}{i}' for i in range(1, nbands +1)])
-    
+            columns = [f'{prefix}{i}' for i in range(1, nbands +1)]
+
     # *****************************************
-    # Remove NA values or not
-    if na_rm is True: 
-        data_out = data.dropna().reset_index(drop=True)
-    else:
-        data_out = data
+    # Remove NA values or not, pixels with NA in any band are dropped with one mask over the 2D array
+    copy = isinstance(input, np.ndarray)
+    if (na_rm is True) and np.issubdtype(bands_array.dtype, np.floating):
+        bands_array = bands_array.compress(~np.isnan(bands_array).any(axis=0), axis=1)
+        copy = False
+
+    # The transposed view is column-major, so each band stays one contiguous column and is wrapped without a copy.
+    # Array input is copied once so the dataframe does not share its memory
+    data_out = pd.DataFrame(bands_array.T, columns=columns, copy=copy)
 
     return data_out
 
@@ -1082,26 +1273,17 @@ def extractValues(input, roi, field, dataframe: Optional[bool]=True, names: Opti
         DataFrame or Tuple: Dataframe if dataframe=True, otherwise X and y arrays for training a model.
 
     """
-    import os
-    import rasterio
-    from rasterio.plot import reshape_as_image
-    import numpy as np
     from shapely.geometry import mapping
     import pandas as pd
-    from .common import array2raster
 
     # *****************************************
     # Define input image
     # Other data type
     if not isinstance(input, rasterio.DatasetReader):
         raise ValueError('Input data is not supported')
-    # Input is raster
+    # Input is raster, only the window covering the features is read later
     else:
-        # Convert datatype of input to float32 to store NA value
-        arr = input.read().astype(np.float32)
-        meta = input.meta
-        meta.update({'dtype': np.float32})
-        input_image = array2raster(arr, meta)
+        input_image = input
         
     # *****************************************
     # Convert shapefile to shapely geometry
@@ -1109,47 +1291,37 @@ def extractValues(input, roi, field, dataframe: Optional[bool]=True, names: Opti
     
     # Extract some metadata information
     nbands = input_image.count
-    dtype_X = np.float32()
-    dtype_y = np.float32()
-
-    # Create empty array to contain X and y arrays
-    X = np.array([], dtype= dtype_X).reshape(0, nbands)
-    y = np.array([], dtype= dtype_y)
-
-    # Run loop over each features in shapefile to extract pixel values
-    for index, geom in enumerate(geoms):
-        poly = [mapping(geom)]
-
-        # Crop image based on feature
-        cropped, transform = rasterio.mask.mask(input_image, poly, crop=True, nodata=np.nan)
-
-        # Reshape dataset in form of (values, bands)
-        cropped_reshape = reshape_as_image(cropped)
-        reshapped = cropped_reshape.reshape(-1, nbands)
-
-        # Append 1D array y
-        y = np.append(y, [roi[field][index]] * reshapped.shape[0])
-        
-        # vertical stack 2D array X
-        X = np.vstack((X, reshapped))
-    
-    # Remove NA value from data
-    data = np.hstack((X, y.reshape(y.shape[0], 1))).astype(np.float32)
-    data_na = data[~np.isnan(data).any(axis=1)]
-    data_nodata = data_na[~(data_na == np.nan).any(axis=1)]
-
-    X_na = data_nodata[ :, 0:nbands]
-    y_na = data_nodata[ : , nbands]
-
-    # return dataframe
+    dtype_X = np.float32
+    dtype_y = np.float32
+
+    # Rasterize all features once into a label raster over their common window, pixels outside features stay NaN
+    shapes = [(mapping(geom), value) for geom, value in zip(geoms, roi[field].values)]
+    try:
+        window = rasterio.features.geometry_window(input_image, [shape for shape, value in shapes], pad_x=1, pad_y=1)
+    except rasterio.errors.WindowError:
+        raise ValueError('Input shapes do not overlap raster.')
+    window_shape = (int(window.height), int(window.width))
+    labels = rasterio.features.rasterize(shapes, out_shape=window_shape, transform=input_image.window_transform(window), fill=np.nan, dtype= dtype_y)
+
+    # Read the window once and gather the pixels of all features, in form of (bands, values). Nodata pixels of the input become NaN and are removed below
+    inside = ~np.isnan(labels)
+    stack = input_image.read(window=window, out_dtype= dtype_X, masked=True).filled(np.nan)
+    X = stack.reshape(nbands, -1).compress(inside.ravel(), axis=1)
+    y = labels[inside]
+
+    # Remove NA value from data, the mask is built on X and y without joining them first.
+    # Pixels are compressed along the rows of (bands, values) and transposed, so each band is one contiguous column of (values, bands)
+    valid = ~np.isnan(X).any(axis=0) & ~np.isnan(y)
+    X_na = X.compress(valid, axis=1).T
+    y_na = y[valid]
+
+    # return dataframe, columns are stacked as rows and transposed to keep them contiguous
     if dataframe is True:
-        y_na_reshape = y_na.reshape(-1,1)
-
         # class tail
         if tail is True:
-            arr = np.hstack([X_na, y_na_reshape])
+            arr = np.vstack([X_na.T, y_na]).T
         else:
-            arr = np.hstack([y_na_reshape, X_na])
+            arr = np.vstack([y_na, X_na.T]).T
         
         # Name is not given
         if names is None:
@@ -1190,50 +1362,70 @@ def extractValues(input, roi, field, dataframe: Optional[bool]=True, names: Opti
 # =========================================================================================== #
 #              Normalize raster data
 # =========================================================================================== #      
-def normalized(input):
+def normalized(input, scale: Optional[int]=None, output: Optional[AnyStr]=None):
     """
     Normalize raster data to rearrange raster values from 0 to 1
 
     Args:
         input (DatasetReader | np.ndarray): Rasterio image or data array.
+        scale (int, optional): Store values as half-size int16 values multiplied by scale, e.g., 10000, with nodata -32768, real value = value * raster.scales[0]. Defaults to None for float32 output.
+        output (AnyStr, optional): GeoTIFF path for raster input. Values are scanned and written in strips of 512 rows, so the input is never held in memory as a whole. Defaults to None.
 
     Returns:
-        raster | data array: Data array or raster depends on the input files.
+        raster | data array: Data array or raster depends on the input files. The written raster if output is given.
 
     """
-    import rasterio
-    import numpy as np
-    import pandas as pd
-    from .common import array2raster
+
+    dtype, nodata, scales = _index_precision(scale)
 
     ### Check input data
     if isinstance(input, rasterio.DatasetReader):
-        dataset = input.read()
         meta = input.meta
+        meta.update({'dtype': dtype})
+        if nodata is not None:
+            meta.update({'nodata': nodata})
+        if scales is not None:
+            scales = scales * meta['count']
+        if output is None:
+            dataset = input.read()
     elif isinstance(input, np.ndarray):
+        if output is not None:
+            raise ValueError('Output path is only supported for raster input')
         dataset = input
-        meta = meta
+        meta = None
     else:
         raise ValueError('Input data is not supported')
-    
-    ### Find max min values
-    maxValue = np.nanmax(dataset)
-    minValue = np.nanmin(dataset)
 
-    ### Create empty data array to store output
-    normalized = np.zeros_like(dataset, dtype=np.float32)
+    def normalize(values, out):
+        np.subtract(values, minValue, out=out, dtype=np.float32)
+        np.divide(out, value_range, out=out)
+
+    ### Write to file strip by strip, a first pass over the strips finds max min values
+    if output is not None:
+        minValue, maxValue = _nan_min_max(chunk for window in _row_strip_windows(input.height, input.width) for chunk in _flat_chunks(input.read(window=window)))
+        value_range = np.float32(maxValue - minValue)
+
+        def compute(window):
+            values = input.read(window=window)
+            normalized = np.empty(values.shape, dtype=np.float32)
+            normalize(values, normalized)
+            return _quantize_index(normalized, scale)
+
+        return _write_row_strips(output, meta, compute, scales)
 
-    ### Run normalization for each 
-    for i in range(0, dataset.shape[0]):
-        band = dataset[i, : , : ]
-        band_norm = (band.astype(float)  - minValue) / (maxValue  - minValue)
-        normalized[i, : , : ] = band_norm
-        band_norm = None        # set to None after the iteration
+    ### Find max min values in one pass over cache-sized chunks
+    minValue, maxValue = _nan_min_max(_flat_chunks(dataset))
+
+    ### Run normalization for all bands in float32, rows of all bands are processed in strips
+    normalized = np.empty(dataset.shape, dtype=np.float32)
+    value_range = np.float32(maxValue - minValue)
+
+    _map_row_strips(normalize, normalized.reshape(-1, dataset.shape[-1]), dataset.reshape(-1, dataset.shape[-1]))
+    normalized = _quantize_index(normalized, scale)
 
     ### Define output
     if isinstance(input, rasterio.DatasetReader):
-        meta.update({'dtype': np.float32})
-        normalized_raster = array2raster(normalized, meta)
+        normalized_raster = array2raster(normalized, meta, scales=scales)
     else:
         normalized_raster = normalized
     
@@ -1257,10 +1449,7 @@ def pca(input, n_component: int=3, **kwargs):
         np.ndarray or rasterio.DatasetReader: PCA-transformed data in the same format as the input.
 
     """
-    import numpy as np
-    import rasterio
     from sklearn.decomposition import PCA
-    from .common import array2raster, reshape_raster
 
     # Identify datatype and define input data
     # Raster image
@@ -1280,9 +1469,8 @@ def pca(input, n_component: int=3, **kwargs):
     else: 
         raise ValueError('Input is not supported')
     
-    # Reshape from raster to image format, and from 3D to 2D
-    ds = reshape_raster(arr, mode='image')
-    ds_reshaped = ds.reshape((-1, nbands)) # -1 means this dim will be determined by other dims
+    # Flatten from raster format to 2D (pixels, bands), a transposed view without copying the image
+    ds_reshaped = np.ascontiguousarray(arr).reshape((nbands, -1)).T
 
     # Define PCA model and fit the PCA model
     pca_model = PCA(n_components= n_component, **kwargs)
@@ -1305,10 +1493,59 @@ def pca(input, n_component: int=3, **kwargs):
         return pca_rast
 
 
+# =========================================================================================== #
+#              Area of raster cells per row on the WGS84 ellipsoid (cached)
+# =========================================================================================== #
+@lru_cache(maxsize=64)
+def _row_areas(upper_Y, lower_Y, rows, pix_width):
+    """Compute the area in square km of one cell in each row of a geographic grid. Only the latitudes matter,
+    so results are cached by grid geometry and returned read-only.
+
+    Args:
+        upper_Y (float): Latitude of the top edge
+        lower_Y (float): Latitude of the bottom edge
+        rows (int): Number of rows
+        pix_width (float): Pixel width in degrees
+
+    Returns:
+        Areas (array): Read-only array of cell areas, one value per row
+
+    """
+
+    lats = np.linspace(upper_Y, lower_Y, rows + 1)
+
+    a = 6378137.0  # Equatorial radius
+    b = 6356752.3142  # Polar radius
+
+    # Degrees to radians, then sine of latitudes (in place)
+    sinlats = np.radians(lats, out=lats)
+    np.sin(sinlats, out=sinlats)
+
+    # Intermediate vars, (1 + e*sin) * (1 - e*sin) = 1 - (e*sin)^2
+    e = np.sqrt(1-(b/a)**2)
+    esin = np.multiply(e, sinlats)
+    zpzm = np.square(esin)
+    np.subtract(1, zpzm, out=zpzm)
+
+    # Distance between meridians
+    q = pix_width/360
+
+    # Compute areas for each latitude in square km, reuse the buffers instead of allocating temporaries
+    areas_to_equator = np.arctanh(esin, out=esin)
+    areas_to_equator /= e
+    areas_to_equator += np.divide(sinlats, zpzm, out=zpzm)
+    areas_to_equator *= np.pi * b**2 / 10**6
+    areas_between_lats = np.diff(areas_to_equator)
+    areas_cells = np.abs(areas_between_lats) * q
+    areas_cells.flags.writeable = False
+
+    return areas_cells
+
+
 # =========================================================================================== #
 #              Estimate raster cell area 
 # =========================================================================================== #
-def cellSize(input, unit: AnyStr='km', meta: Optional[AnyStr]=None):
+def cellSize(input, unit: AnyStr='km', meta: Optional[AnyStr]=None, precision: AnyStr='f4'):
     '''
     Calculate pixel size (area), the input has to be in the projection of 'EPSG:4326'. If not, it can be reprojected by "project" function
 
@@ -1316,6 +1553,7 @@ def cellSize(input, unit: AnyStr='km', meta: Optional[AnyStr]=None):
         input: rasterio image or data array
         unit: string, default is "km", the unit to calculate area
         meta: optional dict, metadata in case input is data array
+        precision: string, default is "f4" for float32 output. "u2" stores half-size uint16 values, the largest area maps to 65535 and real area = value * raster.scales[0]. There is no nodata value
     
     Example:
        img = raster.rast('./Sample_data/temperature.tif')
@@ -1325,27 +1563,13 @@ def cellSize(input, unit: AnyStr='km', meta: Optional[AnyStr]=None):
         raster: a raster of area in selected unit.
 
     '''
-    import rasterio
-    import numpy as np
-    from .common import array2raster
 
-    ### Check input data
+    ### Check input data, cell area only depends on the grid so pixel values are not read
     if isinstance(input, rasterio.DatasetReader):
-        if len(input.shape) == 2:
-            dataset = input.read()
-            meta = input.meta
-        else:
-            dataset = input.read(1)
-            meta = input.meta
+        meta = input.meta
     elif isinstance(input, np.ndarray):
         if meta is None:
             raise ValueError('Please provide input metadata')
-        else:
-            if len(input) > 2:
-                dataset = input[0, :, : ]
-            else:
-                dataset = input
-            meta = meta
     else:
         raise ValueError('Input data is not supported')
     
@@ -1359,52 +1583,37 @@ def cellSize(input, unit: AnyStr='km', meta: Optional[AnyStr]=None):
     lower_X = upper_X + transform[0] * cols
     lower_Y = upper_Y + transform[4] * rows
 
-    lats = np.linspace(upper_Y, lower_Y, rows + 1)
-
-    a = 6378137.0  # Equatorial radius
-    b = 6356752.3142  # Polar radius
-
-    # Degrees to radians
-    lats = lats * np.pi/180
-
-    # Intermediate vars
-    e = np.sqrt(1-(b/a)**2)
-    sinlats = np.sin(lats)
-    zm = 1 - e * sinlats
-    zp = 1 + e * sinlats
+    # Area of the cells in each row in square km, cached so repeated calls on the same grid skip the math.
+    # The cached array is read-only, work on a copy as the unit conversion below is in place
+    areas_cells = _row_areas(upper_Y, lower_Y, rows, pix_width).copy()
 
-    # Distance between meridians
-    q = pix_width/360
-
-    # Compute areas for each latitude in square km
-    areas_to_equator = np.pi * b**2 * ((2*np.arctanh(e*sinlats) / (2*e) + sinlats / (zp*zm))) / 10**6
-    areas_between_lats = np.diff(areas_to_equator)
-    areas_cells = np.abs(areas_between_lats) * q
-
-    # Create empty array to store output
-    cellArea = np.zeros_like(dataset, dtype=np.float32)
-    
-    # Assign estimated cell area to every pixel
-    if len(cellArea.shape) == 2:
-        for i in range(0, cellArea.shape[1]):
-            cellArea[:, i] = areas_cells.flatten()
+    ### Convert unit (if applicable), on the row vector before it is spread over the columns. Areas above are in km², 1 km² = 100 ha
+    if (unit.lower() == 'm') or (unit.lower() == 'meter'):
+        areas_cells *= 1_000_000
+    elif (unit.lower() == 'ha') or (unit.lower() == 'hectare'):
+        areas_cells *= 100
+
+    # Full precision, or 16-bit integers scaled to the largest area (rasterio has no float16 type)
+    if precision == 'f4':
+        areas_cells = areas_cells.astype(np.float32, copy=False)
+        scales = None
+    elif precision == 'u2':
+        # A grid with no area (zero height) stores zeros, keep the scale usable
+        scale = areas_cells.max() / np.iinfo(np.uint16).max if areas_cells.size else 0
+        if scale == 0:
+            scale = 1
+        areas_cells = np.rint(areas_cells / scale).astype(np.uint16)
+        scales = [float(scale)]
     else:
-        for i in range(0, cellArea.shape[2]):
-            cellArea[:, :, i] = areas_cells.flatten()
+        raise ValueError("Precision must be one of these types (f4, u2)")
+
+    # Every pixel of a row has the same area, a read-only broadcast view avoids building a full array here
+    cellArea = np.broadcast_to(areas_cells[:, None], (rows, cols))
 
     ### Update metadata
-    meta.update({'dtype': np.float32, 'count': 1})
+    meta.update({'dtype': areas_cells.dtype, 'count': 1})
 
-    ### Convert unit (if applicable)
-    if (unit.lower() == 'km') or (unit.lower() == 'kilometer'):
-        outArea = cellArea
-    elif (unit.lower() == 'm') or (unit.lower() == 'meter'):
-        outArea = cellArea * 1_000_000
-    elif (unit.lower() == 'ha') or (unit.lower() == 'hectare'):
-        outArea = cellArea * 10_000
-    
     # Output
-        
-    outArea = array2raster(cellArea, meta)
+    outArea = array2raster(cellArea, meta, scales=scales)
 
     return outArea, meta
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+
+"""Tests for `geonate.common` module."""
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+
+from geonate import common
+
+
+class TestCommon(unittest.TestCase):
+    """Tests for `geonate.common` module."""
+
+    def setUp(self):
+        """Set up a temporary folder with files in nested folders."""
+        self.tmpdir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.tmpdir, 'sub', 'deep'))
+        for name in ['a.tif', 'b.TIF', 'c.shp', os.path.join('sub', 'd.tif'), os.path.join('sub', 'deep', 'e.tif')]:
+            open(os.path.join(self.tmpdir, name), 'w').close()
+
+    def tearDown(self):
+        """Remove the temporary folder."""
+        shutil.rmtree(self.tmpdir)
+
+    def test_iterFiles_is_lazy_and_matches_listFiles(self):
+        """iterFiles returns an iterator yielding the same files in the same order as listFiles."""
+        for pattern, search_type in [('*.tif', 'pattern'), ('tif', 'extension'), ('.TIF', 'e')]:
+            files = common.iterFiles(self.tmpdir, pattern, search_type)
+            self.assertIs(iter(files), files)
+            self.assertEqual(list(files), common.listFiles(self.tmpdir, pattern, search_type))
+
+    def test_iterFiles_extension_is_case_insensitive(self):
+        """Extension search matches every tif file in nested folders whatever the case."""
+        names = sorted(common.iterFiles(self.tmpdir, 'tif', 'extension', full_name=False))
+        self.assertEqual(names, ['a.tif', 'b.TIF', 'd.tif', 'e.tif'])
+
+    def test_iterFiles_invalid_search_type(self):
+        """Unknown search types are rejected."""
+        with self.assertRaises(ValueError):
+            common.iterFiles(self.tmpdir, '*.tif', 'regex')
+
+    def test_array2raster_lazy_matches_raster(self):
+        """The lazy raster is an uncompressed rasterio dataset with the same grid and values, usable by the processor functions."""
+        import geopandas as gpd
+        from shapely.geometry import box
+
+        from geonate import processor
+
+        array = np.arange(2 * 50 * 40, dtype=np.float32).reshape(2, 50, 40)
+        meta = {'driver': 'GTiff', 'dtype': 'float64', 'count': 2, 'height': 50, 'width': 40, 'crs': 'EPSG:4326',
+                'transform': from_origin(100.0, 20.0, 0.5, 0.5), 'nodata': None, 'compress': 'lzw'}
+        raster = common.array2raster(array, dict(meta))
+        lazy = common.array2raster(array, dict(meta), lazy=True)
+        self.assertIsInstance(lazy, rasterio.DatasetReader)
+        self.assertIsNone(lazy.compression)
+        for attribute in ['count', 'height', 'width', 'shape', 'transform', 'crs', 'nodata', 'bounds', 'dtypes']:
+            self.assertEqual(getattr(lazy, attribute), getattr(raster, attribute), attribute)
+        # The data type follows the array, not the metadata given
+        self.assertEqual(lazy.dtypes, ('float32', 'float32'))
+        np.testing.assert_array_equal(lazy.read(), array)
+
+        # Reads are copies, changing one does not change the array or later reads
+        values = lazy.read(1)
+        values[:] = -1
+        self.assertFalse(np.shares_memory(values, array))
+        np.testing.assert_array_equal(lazy.read(1), array[0])
+
+        # The lazy raster goes through functions expecting a rasterio dataset
+        reference = gpd.GeoDataFrame(geometry=[box(105.0, 5.0, 110.0, 15.0)], crs='EPSG:4326')
+        np.testing.assert_array_equal(processor.crop(lazy, reference).read(), processor.crop(raster, reference).read())
+        np.testing.assert_array_equal(processor.mask(lazy, reference).read(), processor.mask(raster, reference).read())
+        projected = processor.reproject(lazy, 'EPSG:3857', res=50000)
+        np.testing.assert_array_equal(projected.read(), processor.reproject(raster, 'EPSG:3857', res=50000).read())
+
+    def test_mimax_approx(self):
+        """The approximate min and max come from a decimated read and stay within the exact range."""
+        rng = np.random.default_rng(0)
+        data = rng.uniform(0, 1, size=(1, 320, 320)).astype(np.float32)
+        data[0, :16, :16], data[0, 16:32, 16:32] = -5, 9
+        path = os.path.join(self.tmpdir, 'input.tif')
+        with rasterio.open(path, 'w', driver='GTiff', dtype='float32', count=1, height=320, width=320, crs='EPSG:4326',
+                           transform=from_origin(100.0, 20.0, 0.01, 0.01)) as dst:
+            dst.write(data)
+        with rasterio.open(path) as src:
+            exact = common.mimax(src, digit=6)
+            approx = common.mimax(src, digit=6, approx=True)
+        self.assertEqual(exact, (-5.0, 9.0))
+        # Nearest decimation by 16 samples one pixel of each 16 x 16 block, so both extreme blocks are picked up
+        self.assertEqual(approx, exact)
+        self.assertEqual(common.mimax(data, digit=6), exact)
+
+    def test_iterFiles_skips_unreadable_folders(self):
+        """A missing path gives no files and an unreadable subfolder is skipped, as with os.walk."""
+        from unittest import mock
+
+        self.assertEqual(common.listFiles(os.path.join(self.tmpdir, 'missing'), '*.tif'), [])
+        locked = os.path.join(self.tmpdir, 'sub', 'deep')
+        scandir = os.scandir
+
+        def scandir_locked(path):
+            if os.path.normpath(path) == locked:
+                raise PermissionError(13, 'Permission denied', path)
+            return scandir(path)
+
+        with mock.patch.object(common.os, 'scandir', scandir_locked):
+            names = sorted(common.iterFiles(self.tmpdir, '*.tif', full_name=False))
+        self.assertEqual(names, ['a.tif', 'd.tif'])
+
+    def test_meter2degree_latitude_types(self):
+        """Python numbers, numpy scalars and 0-d arrays give the same scalar, arrays give an array."""
+        for latitude in [45, 45.0, np.float64(45), np.float32(45), np.array(45.0), np.array(45)]:
+            degree = common.meter2degree(1000, latitude)
+            self.assertEqual(np.ndim(degree), 0)
+            self.assertAlmostEqual(degree, 1000 / (111320 * np.cos(np.radians(45))), places=12)
+            self.assertAlmostEqual(common.degree2meter(degree, latitude), 1000, places=6)
+        np.testing.assert_allclose(common.degree2meter(common.meter2degree(1000, np.array([10.0, 45.0])), np.array([10.0, 45.0])), 1000)
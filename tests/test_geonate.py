@@ -3,7 +3,16 @@
 """Tests for `geonate` package."""
 
 
+import filecmp
+import os
+import shutil
+import tempfile
 import unittest
+from unittest import mock
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
 
 from geonate import geonate
 
@@ -13,9 +22,36 @@ class TestGeonate(unittest.TestCase):
 
     def setUp(self):
         """Set up test fixtures, if any."""
+        self.tmpdir = tempfile.mkdtemp()
 
     def tearDown(self):
         """Tear down test fixtures, if any."""
+        shutil.rmtree(self.tmpdir)
 
     def test_000_something(self):
         """Test something."""
+
+    def test_001_package_namespace(self):
+        """Module imports do not leak into the top-level package."""
+        import geonate as package
+        for name in ['os', 'shutil', 'find_spec', 'np', 'rasterio', 'Window']:
+            self.assertFalse(hasattr(package, name), name)
+        for name in ['rast', 'vect', 'writeRaster', 'plotRGB']:
+            self.assertTrue(hasattr(package, name), name)
+
+    def test_002_writeRaster_copies_matching_file(self):
+        """A file already written with the requested compression is copied byte for byte, otherwise it is encoded again."""
+        data = np.arange(3 * 600 * 40, dtype=np.float32).reshape(3, 600, 40)
+        meta = {'driver': 'GTiff', 'dtype': 'float32', 'count': 3, 'height': 600, 'width': 40, 'crs': 'EPSG:4326',
+                'transform': from_origin(100.0, 20.0, 0.01, 0.01), 'nodata': None}
+        for source_compress, compress, copied in [('zstd', 'zstd', True), ('lzw', 'lzw', True), ('deflate', 'deflate', True), ('zstd', 'lzw', False)]:
+            source = os.path.join(self.tmpdir, f'source_{source_compress}.tif')
+            output = os.path.join(self.tmpdir, 'output.tif')
+            geonate.writeRaster(data, source, meta=dict(meta), compress=source_compress)
+            with rasterio.open(source) as src, mock.patch.object(geonate.shutil, 'copyfile', wraps=shutil.copyfile) as copyfile:
+                geonate.writeRaster(src, output, compress=compress)
+            self.assertEqual(copyfile.called, copied, (source_compress, compress))
+            self.assertEqual(filecmp.cmp(source, output, shallow=False), copied)
+            with rasterio.open(output) as dst:
+                self.assertEqual(dst.compression.value.lower(), compress)
+                np.testing.assert_array_equal(dst.read(), data)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+"""Tests for `geonate.post_classify` module and the reclassify function shared with `geonate.processor`."""
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+
+from geonate import post_classify, processor
+
+
+def reclassify_loop(dataset, breakpoints, classes):
+    """Reference reclassification with the loop of masks used before the lookup table and binary search"""
+    reclassified = np.zeros_like(dataset)
+    if len(breakpoints) == len(classes):
+        for i in range(len(classes)):
+            reclassified[dataset == breakpoints[i]] = classes[i]
+    else:
+        for i in range(len(classes)):
+            reclassified[(dataset >= breakpoints[i]) & (dataset < breakpoints[i+1])] = classes[i]
+    return reclassified
+
+
+class TestReclassify(unittest.TestCase):
+    """Tests for reclassify of `geonate.processor` and `geonate.post_classify`."""
+
+    implementations = [processor.reclassify, post_classify.reclassify]
+
+    def setUp(self):
+        """Set up a temporary folder."""
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the temporary folder."""
+        shutil.rmtree(self.tmpdir)
+
+    def assert_matches_loop(self, dataset, breakpoints, classes):
+        expected = reclassify_loop(dataset, breakpoints, classes)
+        for reclassify in self.implementations:
+            result = reclassify(dataset, breakpoints, classes)
+            self.assertEqual(result.dtype, dataset.dtype)
+            np.testing.assert_array_equal(result, expected, err_msg=f'{reclassify.__module__} {breakpoints} {classes}')
+
+    def test_discrete_lookup_table(self):
+        """Small non-negative integers, values without a class become 0."""
+        dataset = np.arange(60, dtype=np.uint8).reshape(6, 10) % 7
+        self.assert_matches_loop(dataset, [1, 2, 3], [10, 20, 30])
+        # Breakpoints outside the value range or not integers do not match any pixel
+        self.assert_matches_loop(dataset, [6, 300, 2.5, -1], [1, 2, 3, 4])
+
+    def test_discrete_binary_search(self):
+        """Negative integers and floats with NaN nodata, values without a class become 0."""
+        self.assert_matches_loop(np.arange(-30, 30, dtype=np.int16).reshape(6, 10) % 7 - 3, [2, -2, 0], [5, 6, 7])
+        dataset = np.tile(np.array([0.5, 1.5, 2.5, np.nan, -0.5], dtype=np.float32), (4, 3))
+        self.assert_matches_loop(dataset, [1.5, 0.5], [2, 1])
+
+    def test_intervals(self):
+        """Values on a breakpoint belong to the interval starting there, values outside every interval and NaN become 0."""
+        dataset = np.array([[-1.5, -1.0, -0.5, 0.0], [0.25, 0.5, 0.99, 1.0], [1.5, np.nan, -np.inf, np.inf]], dtype=np.float32)
+        self.assert_matches_loop(dataset, [-1, 0, 0.5, 1], [1, 2, 3])
+        self.assert_matches_loop(np.arange(-20, 20, dtype=np.int32).reshape(4, 10), [-10, 0, 10], [1, 2])
+
+    def test_raster_input(self):
+        """Raster input gives a raster with the reclassified values."""
+        dataset = np.arange(100, dtype=np.float32).reshape(1, 10, 10) / 10
+        path = os.path.join(self.tmpdir, 'input.tif')
+        with rasterio.open(path, 'w', driver='GTiff', dtype='float32', count=1, height=10, width=10, crs='EPSG:4326',
+                           transform=from_origin(100.0, 20.0, 0.01, 0.01)) as dst:
+            dst.write(dataset)
+        expected = reclassify_loop(dataset, [0, 2, 5, 9.5], [1, 2, 3])
+        for reclassify in self.implementations:
+            with rasterio.open(path) as src:
+                np.testing.assert_array_equal(reclassify(src, [0, 2, 5, 9.5], [1, 2, 3]).read(), expected)
+
+    def test_breakpoint_count(self):
+        """Other numbers of breakpoints are rejected."""
+        for reclassify in self.implementations:
+            with self.assertRaises(ValueError):
+                reclassify(np.zeros((3, 3), dtype=np.float32), [0, 1, 2, 3], [1, 2])
@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+
+"""Tests for `geonate.processor` module."""
+
+
+import os
+import shutil
+import tempfile
+import unittest
+from importlib.util import find_spec
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+
+from geonate import processor
+
+
+def write_test_raster(path, data, transform=None, nodata=None):
+    """Write a small float32 EPSG:4326 GeoTIFF of data in form of [band, height, width]"""
+    if transform is None:
+        transform = from_origin(100.0, 20.0, 0.01, 0.01)
+    meta = {'driver': 'GTiff', 'dtype': data.dtype, 'count': data.shape[0], 'height': data.shape[1], 'width': data.shape[2],
+            'crs': 'EPSG:4326', 'transform': transform, 'nodata': nodata}
+    with rasterio.open(path, 'w', **meta) as dst:
+        dst.write(data)
+    return path
+
+
+class TestProcessor(unittest.TestCase):
+    """Tests for `geonate.processor` module."""
+
+    def setUp(self):
+        """Set up a temporary folder with a 3-band raster of 700 rows, more than one output strip."""
+        self.tmpdir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        self.data = rng.uniform(1, 100, size=(3, 700, 40)).astype(np.float32)
+        self.data[:, 5, 7] = np.nan
+        self.path = write_test_raster(os.path.join(self.tmpdir, 'input.tif'), self.data)
+
+    def tearDown(self):
+        """Remove the temporary folder."""
+        shutil.rmtree(self.tmpdir)
+
+    def test_normalizedDifference_scale_round_trip(self):
+        """Int16 values times raster.scales give back the float32 index."""
+        with rasterio.open(self.path) as src:
+            expected = processor.normalizedDifference(src, 0, 1).read(1)
+        with rasterio.open(self.path) as src:
+            scaled = processor.normalizedDifference(src, 0, 1, scale=10000)
+        values = scaled.read(1)
+        self.assertEqual(values.dtype, np.int16)
+        self.assertEqual(scaled.nodata, -32768)
+        nodata = values == scaled.nodata
+        np.testing.assert_array_equal(nodata, np.isnan(expected))
+        np.testing.assert_allclose(values[~nodata] * scaled.scales[0], expected[~nodata], atol=0.5e-4 + 1e-7)
+
+    def test_normalized_scale_round_trip(self):
+        """Int16 values times raster.scales give back the float32 normalized values of every band."""
+        with rasterio.open(self.path) as src:
+            expected = processor.normalized(src).read()
+        with rasterio.open(self.path) as src:
+            scaled = processor.normalized(src, scale=10000)
+        values = scaled.read()
+        self.assertEqual(scaled.scales, (1e-4,) * 3)
+        nodata = values == scaled.nodata
+        np.testing.assert_array_equal(nodata, np.isnan(expected))
+        np.testing.assert_allclose(values[~nodata] * 1e-4, expected[~nodata], atol=0.5e-4 + 1e-7)
+
+    def test_scale_out_of_int16_range(self):
+        """Scales that overflow int16 are rejected."""
+        with self.assertRaises(ValueError):
+            processor.normalizedDifference(self.data, 0, 1, scale=40000)
+
+    def test_cellSize_units(self):
+        """Areas in m and ha agree with areas in km, 1 km² = 1e6 m² = 100 ha."""
+        with rasterio.open(self.path) as src:
+            km = processor.cellSize(src, unit='km')[0].read(1).astype(np.float64)
+            m = processor.cellSize(src, unit='m')[0].read(1).astype(np.float64)
+            ha = processor.cellSize(src, unit='ha')[0].read(1).astype(np.float64)
+        # A 0.01 degree cell near 20°N is about 1.1 km by 1.05 km
+        self.assertTrue(np.all((km > 1.0) & (km < 1.3)))
+        np.testing.assert_allclose(m, km * 1_000_000, rtol=1e-6)
+        np.testing.assert_allclose(ha, km * 100, rtol=1e-6)
+
+    def test_cellSize_u2_round_trip(self):
+        """Uint16 areas times raster.scales give back the float32 areas."""
+        with rasterio.open(self.path) as src:
+            expected = processor.cellSize(src)[0].read(1)
+            scaled = processor.cellSize(src, precision='u2')[0]
+        values = scaled.read(1)
+        self.assertEqual(values.dtype, np.uint16)
+        self.assertEqual(values.max(), 65535)
+        np.testing.assert_allclose(values * scaled.scales[0], expected, rtol=1e-4)
+
+    def test_cellSize_u2_zero_area(self):
+        """A grid whose rows have no area stores zeros instead of dividing by zero."""
+        meta = {'driver': 'GTiff', 'dtype': 'float32', 'count': 1, 'height': 4, 'width': 3, 'crs': 'EPSG:4326',
+                'transform': rasterio.Affine(0.01, 0, 100.0, 0, 0, 20.0), 'nodata': None}
+        with np.errstate(all='raise'):
+            scaled = processor.cellSize(np.zeros((4, 3), dtype=np.float32), meta=meta, precision='u2')[0]
+        np.testing.assert_array_equal(scaled.read(1), 0)
+        self.assertEqual(scaled.scales[0], 1.0)
+
+    def test_resample_factor_one_writes_output(self):
+        """A factor of 1 still writes the output file, with the input values."""
+        output = os.path.join(self.tmpdir, 'resampled.tif')
+        with rasterio.open(self.path) as src:
+            resampled = processor.resample(src, 1, output=output)
+            self.assertTrue(os.path.isfile(output))
+            self.assertEqual(resampled.transform, src.transform)
+            np.testing.assert_array_equal(resampled.read(), self.data)
+
+    def test_resample_output_matches_in_memory(self):
+        """Values written strip by strip equal the in-memory result."""
+        output = os.path.join(self.tmpdir, 'resampled.tif')
+        for method in ['near', 'average']:
+            with rasterio.open(self.path) as src:
+                expected = processor.resample(src, 2, method=method)
+                streamed = processor.resample(src, 2, method=method, output=output)
+            self.assertEqual(streamed.transform, expected.transform)
+            np.testing.assert_array_equal(streamed.read(), expected.read())
+            streamed.close()
+
+    def test_match_output_matches_in_memory(self):
+        """Values written strip by strip equal the in-memory result, for shifted and resampled reference grids."""
+        reference_path = write_test_raster(os.path.join(self.tmpdir, 'reference.tif'), np.zeros((1, 600, 50), dtype=np.float32),
+                                           transform=from_origin(100.05, 19.9, 0.01, 0.01))
+        coarse_path = write_test_raster(os.path.join(self.tmpdir, 'coarse.tif'), np.zeros((1, 120, 10), dtype=np.float32),
+                                        transform=from_origin(100.0, 20.0, 0.04, 0.04))
+        output = os.path.join(self.tmpdir, 'matched.tif')
+        for reference_file, method in [(reference_path, 'near'), (reference_path, 'bilinear'), (coarse_path, 'near'), (coarse_path, 'average')]:
+            with rasterio.open(self.path) as src, rasterio.open(reference_file) as reference:
+                expected = processor.match(src, reference, method=method)
+                streamed = processor.match(src, reference, method=method, output=output)
+            np.testing.assert_array_equal(streamed.read(), expected.read())
+            streamed.close()
+
+    def test_normalizedDifference_output_matches_in_memory(self):
+        """Values written strip by strip equal the in-memory result."""
+        output = os.path.join(self.tmpdir, 'ndvi.tif')
+        with rasterio.open(self.path) as src:
+            expected = processor.normalizedDifference(src, 0, 1).read()
+        with rasterio.open(self.path) as src:
+            streamed = processor.normalizedDifference(src, 0, 1, output=output)
+        np.testing.assert_array_equal(streamed.read(), expected)
+
+    def test_normalized_output_matches_in_memory(self):
+        """Values written strip by strip equal the in-memory result."""
+        output = os.path.join(self.tmpdir, 'normalized.tif')
+        with rasterio.open(self.path) as src:
+            expected = processor.normalized(src).read()
+        with rasterio.open(self.path) as src:
+            streamed = processor.normalized(src, output=output)
+        np.testing.assert_array_equal(streamed.read(), expected)
+
+    @unittest.skipIf(find_spec('osgeo') is None, 'GDAL Python bindings are not installed')
+    def test_stackVRT_matches_layerstack(self):
+        """Bands stacked on disk through a VRT equal the first band of each file."""
+        paths = [write_test_raster(os.path.join(self.tmpdir, f'band{i}.tif'), self.data[i:i + 1]) for i in range(3)]
+        output = os.path.join(self.tmpdir, 'stack.tif')
+        processor.stackVRT(paths, output)
+        with rasterio.open(output) as stacked:
+            self.assertEqual(stacked.count, 3)
+            np.testing.assert_array_equal(stacked.read(), self.data)
+
+    def test_merge_average_float32(self):
+        """Overlapping areas are averaged and the mosaic is float32 for float32 and integer inputs."""
+        for dtype in [np.float32, np.uint8]:
+            first = write_test_raster(os.path.join(self.tmpdir, 'first.tif'), np.full((1, 10, 10), 2, dtype=dtype),
+                                      transform=from_origin(100.0, 20.0, 0.01, 0.01))
+            second = write_test_raster(os.path.join(self.tmpdir, 'second.tif'), np.full((1, 10, 10), 5, dtype=dtype),
+                                       transform=from_origin(100.05, 20.0, 0.01, 0.01))
+            merged = processor.merge([first, second])
+            values = merged.read(1)
+            self.assertEqual(merged.dtypes[0], 'float32')
+            self.assertEqual(values.shape, (10, 15))
+            np.testing.assert_array_equal(values[:, :5], 2)
+            np.testing.assert_array_equal(values[:, 5:10], 3.5)
+            np.testing.assert_array_equal(values[:, 10:], 5)
+
+    def test_crop_on_grid_box_window(self):
+        """A box on the pixel grid gives the same exact window through the windowed read and the mask path."""
+        import geopandas as gpd
+        from shapely.geometry import box
+
+        path = write_test_raster(os.path.join(self.tmpdir, 'grid.tif'), np.ones((1, 300, 400), dtype=np.float32))
+        reference = gpd.GeoDataFrame(geometry=[box(100.5, 18.2, 102.5, 19.6)], crs='EPSG:4326')
+        with rasterio.open(path) as src:
+            cropped = processor.crop(src, reference)
+            masked = processor.mask(src, reference)
+            dtype, nodata_value = processor._mask_nodata(src)
+            mask_read, transform = processor._mask_read(src, [box(100.5, 18.2, 102.5, 19.6).__geo_interface__], nodata_value, dtype)
+        for raster in [cropped, masked]:
+            self.assertEqual(raster.shape, (140, 200))
+            self.assertAlmostEqual(raster.transform.f, 19.6)
+            self.assertAlmostEqual(raster.transform.c, 100.5)
+            self.assertFalse(np.isnan(raster.read()).any())
+        self.assertEqual(mask_read.shape, (1, 140, 200))
+        self.assertEqual(transform, cropped.transform)
+
+    def test_extractValues_matches_mask_samples(self):
+        """Samples equal those of masking each feature with rasterio.mask, nodata pixels inside the features are dropped."""
+        import geopandas as gpd
+        import rasterio.mask
+        from shapely.geometry import box, Point
+
+        from geonate.common import array2raster
+
+        rng = np.random.default_rng(1)
+        data = rng.integers(1, 255, size=(2, 60, 60), dtype=np.uint8)
+        data[:, 10:14, 10:14] = 0
+        data[1, 40, 40] = 0
+        path = write_test_raster(os.path.join(self.tmpdir, 'uint8.tif'), data, nodata=0)
+        roi = gpd.GeoDataFrame({'class': [1, 2]}, geometry=[box(100.05, 19.7, 100.2, 19.85), Point(100.405, 19.595).buffer(0.08)], crs='EPSG:4326')
+
+        with rasterio.open(path) as src:
+            X, y = processor.extractValues(src, roi, 'class', dataframe=False)
+            # Reference of the mask based extraction, on a float32 copy that keeps the nodata value of the input
+            meta = src.meta
+            meta.update({'dtype': np.float32})
+            image = array2raster(src.read().astype(np.float32), meta)
+        expected = []
+        for geom, value in zip(roi.geometry, roi['class']):
+            cropped, _ = rasterio.mask.mask(image, [geom.__geo_interface__], crop=True, nodata=np.nan)
+            samples = cropped.reshape(2, -1).T
+            samples = samples[~np.isnan(samples).any(axis=1)]
+            expected.append(np.column_stack([samples, np.full(len(samples), value)]))
+        expected = np.concatenate(expected)
+
+        self.assertFalse((X == 0).any())
+        self.assertEqual(len(X), len(expected))
+        actual = np.column_stack([X, y])
+        np.testing.assert_array_equal(actual[np.lexsort(actual.T)], expected[np.lexsort(expected.T)])
+
+    def test_match_boundary_warp_threads(self):
+        """The number of warp threads reaches the GDAL warp options of the virtual dataset."""
+        from unittest import mock
+
+        reference_path = write_test_raster(os.path.join(self.tmpdir, 'reference.tif'), np.ones((1, 100, 100), dtype=np.float32),
+                                           transform=from_origin(100.2, 20.5, 0.01, 0.01))
+        options = []
+
+        class RecordingVRT(rasterio.vrt.WarpedVRT):
+            def __enter__(self):
+                options.append(self.tags(ns='xml:VRT')['xml:VRT'])
+                return super().__enter__()
+
+        with rasterio.open(self.path) as src, rasterio.open(reference_path) as reference, mock.patch.object(processor, 'WarpedVRT', RecordingVRT):
+            matched = processor.match_boundary(src, reference)
+        self.assertEqual(len(options), 1)
+        self.assertIn('<Option name="NUM_THREADS">ALL_CPUS</Option>', options[0])
+        self.assertNotIn('WARP_EXTRAS', options[0])
+        self.assertEqual(matched.shape, (750, 120))
+
+    def test_resample_float32_output(self):
+        """Resampled rasters are float32 for every method, as before, integer inputs included."""
+        path = write_test_raster(os.path.join(self.tmpdir, 'uint8.tif'), np.arange(40 * 40, dtype=np.uint16).reshape(1, 40, 40).astype(np.uint8))
+        with rasterio.open(path) as src:
+            for method in ['near', 'average', 'bilinear']:
+                resampled = processor.resample(src, 2, method=method)
+                self.assertEqual(resampled.dtypes[0], 'float32', method)
+            # Nearest neighbour values are still source values
+            self.assertTrue(np.isin(processor.resample(src, 2, method='near').read(1), src.read(1)).all())
+
+    def test_match_aligned_fast_path(self):
+        """A reference grid shifted by whole pixels is copied without warping and equals the warped result, a half pixel shift is warped."""
+        from unittest import mock
+
+        aligned_path = write_test_raster(os.path.join(self.tmpdir, 'aligned.tif'), np.zeros((1, 300, 60), dtype=np.float32),
+                                         transform=from_origin(99.9, 19.5, 0.01, 0.01))
+        shifted_path = write_test_raster(os.path.join(self.tmpdir, 'shifted.tif'), np.zeros((1, 300, 60), dtype=np.float32),
+                                         transform=from_origin(99.905, 19.495, 0.01, 0.01))
+        for method in ['near', 'bilinear', 'cubic', 'lanczos']:
+            with rasterio.open(self.path) as src, rasterio.open(aligned_path) as aligned, rasterio.open(shifted_path) as shifted:
+                # Any warp option turns the fast path off
+                warped = processor.match(src, aligned, method=method, num_threads=1).read()
+                with mock.patch.object(processor.warp, 'reproject', wraps=processor.warp.reproject) as reproject:
+                    copied = processor.match(src, aligned, method=method).read()
+                    self.assertFalse(reproject.called, method)
+                    processor.match(src, shifted, method=method)
+                    self.assertTrue(reproject.called, method)
+            np.testing.assert_allclose(copied, warped, rtol=1e-6, atol=1e-6, err_msg=method)
+            np.testing.assert_array_equal(np.isnan(copied), np.isnan(warped))